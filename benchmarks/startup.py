@@ -0,0 +1,67 @@
+"""Cold-start benchmark: time importing the entry points in fresh interpreters.
+
+    python -m benchmarks.startup                 # table
+    python -m benchmarks.startup --json          # one JSON object, for tracking over time
+    python -m benchmarks.startup --top 15        # also list the slowest imports (-X importtime)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+TARGETS = ['src.api.app', 'src.worker', 'src.jobs', 'src.db']
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _run(args):
+    env = dict(os.environ, PYTHONPATH=ROOT, RUN_SCHEDULER='0')
+    return subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+def time_import(module, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _run(['-c', f'import {module}'])
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def slowest_imports(module, top):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    stderr = _run(['-X', 'importtime', '-c', f'import {module}']).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('targets', nargs='*', default=TARGETS)
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--top', type=int, default=0, help="Show the N slowest imports of the first target")
+    args = parser.parse_args(argv)
+
+    baseline = statistics.median(time_import('sys', args.runs))
+    results = {'python': sys.version.split()[0], 'interpreter_ms': round(baseline, 1)}
+    for module in args.targets:
+        samples = time_import(module, args.runs)
+        results[module] = {'min_ms': round(min(samples), 1), 'median_ms': round(statistics.median(samples), 1)}
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{'target':<16}{'min ms':>10}{'median ms':>12}   (bare interpreter {results['interpreter_ms']} ms)")
+        for module in args.targets:
+            print(f"{module:<16}{results[module]['min_ms']:>10}{results[module]['median_ms']:>12}")
+    if args.top:
+        print(f"\nSlowest imports for {args.targets[0]} (cumulative us, self us):")
+        for cumulative, self_us, name in slowest_imports(args.targets[0], args.top):
+            print(f"{cumulative:>10} {self_us:>10}  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -1,173 +1,270 @@
 import logging
-from fastapi import FastAPI, Query
-from src.scraper.scraper_config import ALL_SCRAPERS
-from src.db import SessionLocal, Article
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, HTTPException, Header
+from fastapi.responses import Response, StreamingResponse, FileResponse
+from starlette.concurrency import run_in_threadpool
+import os
+import hmac
+from sqlalchemy.orm import undefer, selectinload
+from sqlalchemy import select
+from src.db import SessionLocal, Article, ArticleLocation, ArticleMedia, Media, SourceBreaker, render_payload, init_db, get_async_sessionmaker, dispose_async_engine
 import datetime
-from apscheduler.schedulers.background import BackgroundScheduler
-import json
-from src.db_utils import upsert_article
+from src import jobs, changes, profiling
+from src.jobs import scrape_all, CACHE_WINDOW_HOURS, SCRAPE_INTERVAL_MINUTES
+from src.utils.export import BATCH_SIZE as EXPORT_BATCH_SIZE, iter_rows, iter_csv, iter_chunks
+from src.media import clear_boilerplate
+from src.scraper.pipeline import shutdown_parse_pool
+from src.scraper.circuit import STATE_VALUES
+from src.metrics import metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Set RUN_SCHEDULER=0 when scraping runs in its own process (python -m src.worker);
+# otherwise every API worker schedules the job and the DB lease picks one to run it.
+RUN_SCHEDULER = os.getenv('RUN_SCHEDULER', '1') == '1'
+# /admin endpoints and /scrape-now?profile=1 require it in an X-Admin-Token header; unset, they are disabled
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
 
-# Use ALL_SCRAPERS from scraper_config
-SCRAPERS = ALL_SCRAPERS
+scheduler = None
 
-# In-memory cache: {url: publication_date}
-article_cache = {}
-CACHE_WINDOW_HOURS = 24
+@asynccontextmanager
+async def lifespan(app):
+    # Importing this module has no side effects; tables and the scheduler are set up here
+    global scheduler
+    init_db()
+    if RUN_SCHEDULER:
+        from apscheduler.schedulers.background import BackgroundScheduler
+        scheduler = BackgroundScheduler()
+        scheduler.add_job(scrape_all, 'interval', minutes=SCRAPE_INTERVAL_MINUTES)
+        scheduler.start()
+    try:
+        yield
+    finally:
+        if scheduler is not None and scheduler.running:
+            scheduler.shutdown()
+        shutdown_parse_pool()
+        await dispose_async_engine()
 
-def load_cache_from_db():
-    session = SessionLocal()
+app = FastAPI(lifespan=lifespan)
+
+def _article_criteria(min_score, country, region):
     cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=CACHE_WINDOW_HOURS)
-    articles = session.query(Article).filter(Article.scraped_at >= cutoff).all()
-    cache = {}
-    for a in articles:
-        if a.publication_date:
-            cache[a.url] = a.publication_date
-    session.close()
-    logger.info(f"Loaded {len(cache)} articles into cache from DB.")
-    return cache
-
-def prune_cache_and_db():
-    now = datetime.datetime.utcnow()
-    to_remove = []
-    for url, pub_date in article_cache.items():
-        # Make pub_date naive if it's aware
-        if hasattr(pub_date, 'tzinfo') and pub_date.tzinfo is not None:
-            pub_date_naive = pub_date.replace(tzinfo=None)
-        else:
-            pub_date_naive = pub_date
-        if (now - pub_date_naive).total_seconds() > CACHE_WINDOW_HOURS * 3600:
-            to_remove.append(url)
-    for url in to_remove:
-        del article_cache[url]
-    if to_remove:
-        logger.info(f"Pruned {len(to_remove)} articles from cache.")
-    # Also prune DB
+    criteria = [Article.scraped_at >= cutoff]
+    if min_score is not None:
+        # Unscored rows (stored before relevance scoring) are left out
+        criteria.append(Article.relevance >= min_score)
+    # Resolved through the indexed article_locations table
+    if country:
+        criteria.append(Article.url.in_(select(ArticleLocation.url).where(ArticleLocation.country == country.upper())))
+    if region:
+        criteria.append(Article.url.in_(select(ArticleLocation.url).where(ArticleLocation.region == region)))
+    return criteria
+
+def _legacy_urls(rows):
+    # Looked up by url: a row given a payload between the two queries is still found
+    return [url for url, payload, _, _ in rows if payload is None]
+
+def _load_articles(criteria):
+    # Sync path (SQLite, or no asyncpg): run in the threadpool
     session = SessionLocal()
-    cutoff = now - datetime.timedelta(hours=CACHE_WINDOW_HOURS)
-    deleted = session.query(Article).filter(Article.publication_date < cutoff).delete()
-    session.commit()
-    session.close()
-    if deleted:
-        logger.info(f"Pruned {deleted} articles from DB (older than {CACHE_WINDOW_HOURS}h).")
+    try:
+        rows = session.query(Article.url, Article.payload, Article.content, Article.scraped_at).filter(*criteria).all()
+        # Rows written before payloads existed are serialized on the fly
+        legacy = {}
+        urls = _legacy_urls(rows)
+        if urls:
+            legacy_rows = session.query(Article).options(selectinload(Article.media)).filter(Article.url.in_(urls))
+            legacy = {a.url: a.payload or a.build_payload() for a in legacy_rows}
+        return rows, legacy
+    finally:
+        session.close()
+
+async def _load_articles_async(Session, criteria):
+    async with Session() as session:
+        rows = (await session.execute(select(Article.url, Article.payload, Article.content, Article.scraped_at).where(*criteria))).all()
+        legacy = {}
+        urls = _legacy_urls(rows)
+        if urls:
+            legacy_rows = await session.execute(
+                select(Article).options(selectinload(Article.media)).where(Article.url.in_(urls)))
+            legacy = {a.url: a.payload or a.build_payload() for a in legacy_rows.scalars()}
+        return rows, legacy
 
-def scrape_all():
-    logger.info("Starting scheduled scraping job...")
+def _render_articles(rows, legacy):
+    # A legacy row deleted between the two queries is left out
+    return b'[' + b','.join(
+        render_payload(payload or legacy[url], content, scraped_at)
+        for url, payload, content, scraped_at in rows if payload or url in legacy
+    ) + b']'
+
+@app.get("/articles")
+async def get_articles(
+    min_score: float = Query(None, ge=0, le=1),
+    country: str = Query(None, min_length=2, max_length=2),
+    region: str = Query(None),
+):
+    criteria = _article_criteria(min_score, country, region)
+    Session = get_async_sessionmaker()
+    if Session is not None:
+        rows, legacy = await _load_articles_async(Session, criteria)
+    else:
+        rows, legacy = await run_in_threadpool(_load_articles, criteria)
+    # Joining a full window of payloads is CPU work; keep it off the event loop
+    body = await run_in_threadpool(_render_articles, rows, legacy)
+    return Response(body, media_type="application/json")
+
+def _read_changes(since):
     session = SessionLocal()
-    total_new = 0
-    prune_cache_and_db()
-    for name, scraper in SCRAPERS.items():
-        logger.info(f"Visiting {name} for latest articles...")
-        articles = scraper.get_latest_articles()
-        logger.info(f"Found {len(articles)} candidate articles on {name}.")
-        new_count = 0
-        for url, pub_date in articles:
-            # Check cache before scraping
-            if url in article_cache and (datetime.datetime.utcnow() - article_cache[url]).total_seconds() < CACHE_WINDOW_HOURS * 3600:
-                continue
-            article = session.query(Article).filter_by(url=url).first()
-            now = datetime.datetime.utcnow()
-            if article and (now - article.scraped_at).total_seconds() < CACHE_WINDOW_HOURS * 3600:
-                # Update cache if missing
-                if url not in article_cache and article.publication_date:
-                    article_cache[url] = article.publication_date
-                continue
-            data = scraper.scrape(url)
-            if data and upsert_article(session, data):
-                # Update cache
-                if data.get('publication_date'):
-                    try:
-                        pub_dt = datetime.datetime.fromisoformat(data['publication_date'])
-                        article_cache[url] = pub_dt
-                    except Exception:
-                        pass
-                new_count += 1
-        logger.info(f"{new_count} new articles scraped and stored for {name}.")
-        total_new += new_count
-    # Cleanup: remove articles older than 24h from DB
-    cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=CACHE_WINDOW_HOURS)
-    deleted = session.query(Article).filter(Article.scraped_at < cutoff).delete()
-    session.commit()
-    total_articles = session.query(Article).count()
-    logger.info(f"Scraping job complete. {total_new} new articles scraped. {deleted} old articles deleted. Total articles in DB: {total_articles}.")
-    session.close()
-    prune_cache_and_db()
+    try:
+        return changes.read_changes(session, since)
+    finally:
+        session.close()
 
-@app.on_event("startup")
-def startup_event():
-    global article_cache
-    article_cache = load_cache_from_db()
-    # Do not run scrape_all() on startup
+@app.get("/articles/changes")
+async def get_changes(since: int = Query(0, ge=0)):
+    # Poll with the returned `next` as the following `since`; resync means changes were pruned, reload /articles
+    entries, next_seq, resync = await run_in_threadpool(_read_changes, since)
+    body = b','.join(data for _, _, data in entries)
+    head = f'{{"since":{since},"next":{next_seq},"resync":{"true" if resync else "false"},"changes":['.encode()
+    return Response(head + body + b']}', media_type="application/json")
 
-scheduler = BackgroundScheduler()
-scheduler.add_job(scrape_all, 'interval', minutes=10)
-scheduler.start()
+STREAM_POLL_SECONDS = float(os.getenv('ARTICLE_STREAM_POLL_SECONDS', '15'))
 
-@app.on_event("shutdown")
-def shutdown_event():
-    scheduler.shutdown()
+@app.get("/articles/stream")
+async def stream_changes(since: int = Query(None, ge=0), last_event_id: int = Header(None)):
+    # Server-Sent Events: one event per change, id = seq so reconnects resume via Last-Event-ID.
+    # Writes in this process wake the stream immediately; others are seen on the next poll.
+    cursor = last_event_id if last_event_id is not None else since
+    if cursor is None:
+        session = SessionLocal()
+        try:
+            cursor = changes.latest_seq(session)
+        finally:
+            session.close()
 
-@app.get("/articles")
-def get_articles():
+    async def events():
+        nonlocal cursor
+        waiter = changes.subscribe()
+        try:
+            while True:
+                entries, next_seq, resync = await run_in_threadpool(_read_changes, cursor)
+                if resync:
+                    yield b'event: resync\ndata: {}\n\n'
+                for seq, op, data in entries:
+                    yield b'id: ' + str(seq).encode() + b'\nevent: ' + op.encode() + b'\ndata: ' + data + b'\n\n'
+                if next_seq != cursor:
+                    # Drain any backlog before sleeping
+                    cursor = next_seq
+                    continue
+                if not await waiter.wait(STREAM_POLL_SECONDS):
+                    yield b': keepalive\n\n'
+        finally:
+            changes.unsubscribe(waiter)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/articles/export")
+def export_articles(format: str = Query("jsonl")):
+    # Streams the current window row by row so large exports run in constant memory
+    if format not in ("jsonl", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'jsonl' or 'csv'")
     session = SessionLocal()
     cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=CACHE_WINDOW_HOURS)
-    articles = session.query(Article).filter(Article.scraped_at >= cutoff).all()
-    session.close()
-    return [a.to_dict() for a in articles]
+    criteria = [Article.scraped_at >= cutoff]
+
+    def payload_lines():
+        # JSONL reuses the stored payloads, as /articles does; only legacy rows are serialized here
+        rows = session.query(Article.url, Article.payload, Article.content, Article.scraped_at).filter(*criteria).yield_per(EXPORT_BATCH_SIZE)
+        for url, payload, content, scraped_at in rows:
+            if payload is None:
+                article = session.query(Article).options(selectinload(Article.media)).filter_by(url=url).first()
+                if article is None:
+                    continue  # deleted since the scan started
+                payload = article.payload or article.build_payload()
+            yield render_payload(payload, content, scraped_at) + b'\n'
+
+    def stream():
+        try:
+            if format == "jsonl":
+                yield from iter_chunks(payload_lines())
+            else:
+                query = session.query(Article).options(undefer(Article.content), selectinload(Article.media)).filter(*criteria)
+                yield from iter_chunks(iter_csv(iter_rows(query)))
+        finally:
+            session.close()
+
+    media_type = "application/x-ndjson" if format == "jsonl" else "text/csv"
+    return StreamingResponse(stream(), media_type=media_type)
+
+@app.get("/metrics")
+def get_metrics():
+    # Counters are this process's; breaker state comes from the DB, so it is
+    # current even when a separate worker (python -m src.worker) runs the job
+    session = SessionLocal()
+    try:
+        breakers = session.query(SourceBreaker.name, SourceBreaker.state, SourceBreaker.failures).all()
+    finally:
+        session.close()
+    extra = {
+        'scrape_source_circuit_state': {(('source', name),): STATE_VALUES.get(state, 0) for name, state, _ in breakers},
+        'scrape_source_consecutive_failures': {(('source', name),): failures or 0 for name, _, failures in breakers},
+    }
+    return Response(metrics.render(extra), media_type="text/plain; version=0.0.4")
+
+def _check_admin(token):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if not token or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
 
 @app.get("/scrape-now")
-def scrape_now():
-    scrape_all()
+def scrape_now(profile: bool = Query(False), x_admin_token: str = Header(None)):
+    # profile=1 profiles this run regardless of SCRAPE_PROFILE; results under /admin/profiles
+    if profile:
+        _check_admin(x_admin_token)
+    if not scrape_all(profile=True if profile else None):
+        return {"status": "Scraping already in progress, or just finished, in another process"}
+    if profile:
+        return {"status": "Scraping triggered", "profile": profiling.last_run_id}
     return {"status": "Scraping triggered"}
 
+@app.get("/admin/profiles")
+def list_profiles(x_admin_token: str = Header(None)):
+    # Profiles written by this host's jobs (SCRAPE_PROFILE_DIR), newest first
+    _check_admin(x_admin_token)
+    return {"profiles": profiling.list_runs()}
+
+@app.get("/admin/profiles/{run_id}")
+def get_profile(run_id: str, x_admin_token: str = Header(None)):
+    _check_admin(x_admin_token)
+    path = profiling.run_file(run_id, 'summary.json')
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json")
+
+@app.get("/admin/profiles/{run_id}/{filename}")
+def get_profile_file(run_id: str, filename: str, x_admin_token: str = Header(None)):
+    # .prof for pstats/snakeviz, .collapsed for flamegraph.pl/speedscope, .tracemalloc for Snapshot.load
+    _check_admin(x_admin_token)
+    path = profiling.run_file(run_id, filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileResponse(path, media_type="application/json" if filename.endswith('.json') else "application/octet-stream", filename=filename)
+
 @app.post("/clear-db")
 def clear_db():
     session = SessionLocal()
+    changes.record_deletes(session)
     deleted = session.query(Article).delete()
+    session.query(ArticleLocation).delete()
+    session.query(ArticleMedia).delete()
+    session.query(Media).delete()
     session.commit()
     session.close()
-    article_cache.clear()
+    changes.notify()
+    clear_boilerplate()
+    jobs.article_cache.clear()
     logger.info(f"Cleared DB and cache. {deleted} articles deleted.")
     return {"status": f"Cleared DB and cache. {deleted} articles deleted."}
-
-def upsert_article(session, data):
-    url = data['article_url']
-    now = datetime.datetime.utcnow()
-    article = session.query(Article).filter_by(url=url).first()
-    if article:
-        # Only update if scraped_at is older than 24h
-        if (now - article.scraped_at).total_seconds() < 24*3600:
-            return False  # Already fresh
-        # Update fields
-        article.headline = data.get('headline')
-        article.subtitle = data.get('subtitle')
-        article.publication_date = datetime.datetime.fromisoformat(data['publication_date']) if data.get('publication_date') else None
-        article.author = data.get('author')
-        article.content = data.get('content')
-        article.tags = json.dumps(data.get('tags', []))
-        article.media_urls = json.dumps(data.get('media_urls', []))
-        article.related_articles = json.dumps(data.get('related_articles', []))
-        article.keywords = json.dumps(data.get('keywords', []))
-        article.scraped_at = now
-    else:
-        article = Article(
-            url=url,
-            headline=data.get('headline'),
-            subtitle=data.get('subtitle'),
-            publication_date=datetime.datetime.fromisoformat(data['publication_date']) if data.get('publication_date') else None,
-            author=data.get('author'),
-            content=data.get('content'),
-            tags=json.dumps(data.get('tags', [])),
-            media_urls=json.dumps(data.get('media_urls', [])),
-            related_articles=json.dumps(data.get('related_articles', [])),
-            keywords=json.dumps(data.get('keywords', [])),
-            scraped_at=now
-        )
-        session.add(article)
-    session.commit()
-    return True 
\ No newline at end of file
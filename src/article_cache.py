@@ -0,0 +1,69 @@
+import heapq
+import calendar
+import datetime
+from src.utils.clean import to_naive_utc
+
+def _to_ts(dt):
+    return calendar.timegm(to_naive_utc(dt).timetuple())
+
+class ArticleCache:
+    """Expiring {url: publication_date} index for the scrape window.
+
+    Timestamps are kept as integer naive-UTC epoch seconds. A min-heap of
+    (timestamp, url) gives amortized O(expired) eviction; heap entries made
+    stale by an update are skipped lazily and compacted once they dominate.
+    """
+
+    def __init__(self, window_hours=24):
+        self.window = window_hours * 3600
+        self._ts = {}
+        self._heap = []
+
+    def __len__(self):
+        return len(self._ts)
+
+    def __contains__(self, url):
+        return url in self._ts
+
+    def __getitem__(self, url):
+        return datetime.datetime.utcfromtimestamp(self._ts[url])
+
+    def __setitem__(self, url, pub_date):
+        ts = _to_ts(pub_date)
+        if self._ts.get(url) == ts:
+            return
+        self._ts[url] = ts
+        heapq.heappush(self._heap, (ts, url))
+        if len(self._heap) > 2 * len(self._ts) + 64:
+            self._compact()
+
+    def __delitem__(self, url):
+        # The heap entry goes stale and is dropped on the next prune/compact
+        del self._ts[url]
+
+    def get(self, url, default=None):
+        return self[url] if url in self._ts else default
+
+    def is_fresh(self, url, now):
+        ts = self._ts.get(url)
+        return ts is not None and _to_ts(now) - ts < self.window
+
+    def prune(self, now):
+        """Evict entries older than the window; returns the number evicted."""
+        cutoff = _to_ts(now) - self.window
+        heap = self._heap
+        removed = 0
+        while heap and heap[0][0] < cutoff:
+            ts, url = heapq.heappop(heap)
+            if self._ts.get(url) == ts:
+                del self._ts[url]
+                removed += 1
+        return removed
+
+    def clear(self):
+        self._ts.clear()
+        self._heap.clear()
+
+    def _compact(self):
+        self._heap = [(ts, url) for url, ts in self._ts.items()]
+        heapq.heapify(self._heap)
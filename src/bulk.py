@@ -0,0 +1,106 @@
+import io
+import os
+import csv
+import datetime
+from sqlalchemy import text
+from sqlalchemy.types import TypeDecorator
+from src.db import engine, Article, ArticleLocation, ArticleChange
+from src.db_utils import article_values
+from src.media import prepare_media, replace_media
+
+# COPY-based ingest for PostgreSQL. A batch is streamed into a temporary
+# staging table with one COPY, merged into articles with a single
+# INSERT .. ON CONFLICT, and its locations and change-feed rows are COPYed
+# too: a handful of round trips per batch instead of several per article.
+# Needs psycopg2 or psycopg (3) as the sync driver; other databases keep
+# db_utils.upsert_article.
+BULK_COPY = (
+    os.getenv('ARTICLE_BULK_COPY', '1') == '1'
+    and engine.dialect.name == 'postgresql'
+    and engine.dialect.driver in ('psycopg2', 'psycopg')
+)
+
+# Same freshness rule as upsert_article: rows scraped within this window are left alone
+FRESH_SECONDS = 24 * 3600
+STAGE_TABLE = 'articles_stage'
+_NULL = '\\N'
+
+ARTICLE_COLUMNS = [column.name for column in Article.__table__.columns]
+# Columns a re-scrape rewrites, as in upsert_article; re-check bookkeeping
+# (checked_at, check_count, change_count) is left as it was
+UPDATE_COLUMNS = list(article_values({})) + ['scraped_at', 'payload']
+LOCATION_COLUMNS = ['url', 'country', 'region', 'place', 'mentions']
+CHANGE_COLUMNS = ['url', 'op', 'changed_at']
+
+def _encode(column, value):
+    # COPY bypasses SQLAlchemy's bind processing, so compressed columns are encoded here
+    if isinstance(column.type, TypeDecorator):
+        value = column.type.process_bind_param(value, engine.dialect)
+    if value is None:
+        return _NULL
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return '\\x' + bytes(value).hex()
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+def _copy(session, table, columns, rows):
+    """COPY rows (sequences ordered like columns) into table on the session's connection."""
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{_NULL}')"
+    cursor = session.connection().connection.dbapi_connection.cursor()
+    try:
+        if engine.dialect.driver == 'psycopg2':
+            buf.seek(0)
+            cursor.copy_expert(sql, buf)
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(buf.getvalue())
+    finally:
+        cursor.close()
+
+def copy_upsert_articles(session, batch, now=None):
+    """Write parsed article dicts; returns the urls inserted or updated. The caller commits."""
+    now = now or datetime.datetime.utcnow()
+    articles = {}
+    for data in batch:
+        # Last one wins: ON CONFLICT cannot touch the same row twice in one statement
+        url = data['article_url']
+        article = Article(url=url, scraped_at=now, **article_values(data))
+        media_urls, media_refs = prepare_media(session, data.get('source'), data.get('media_urls'))
+        article.payload = article.build_payload(media_urls)
+        articles[url] = (article, data.get('locations', []), media_refs)
+    if not articles:
+        return []
+
+    # Kept for the connection's lifetime and emptied at each commit
+    session.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} (LIKE {Article.__tablename__} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    ))
+    columns = Article.__table__.columns
+    _copy(session, STAGE_TABLE, ARTICLE_COLUMNS, (
+        [_encode(column, getattr(article, column.key)) for column in columns]
+        for article, _, _ in articles.values()
+    ))
+    column_list = ', '.join(ARTICLE_COLUMNS)
+    updates = ', '.join(f"{name} = EXCLUDED.{name}" for name in UPDATE_COLUMNS)
+    written = session.execute(text(
+        f"INSERT INTO {Article.__tablename__} ({column_list}) SELECT {column_list} FROM {STAGE_TABLE} "
+        f"ON CONFLICT (url) DO UPDATE SET {updates} "
+        f"WHERE {Article.__tablename__}.scraped_at < :fresh_before RETURNING url"
+    ), {'fresh_before': now - datetime.timedelta(seconds=FRESH_SECONDS)}).scalars().all()
+    if not written:
+        return []
+
+    session.query(ArticleLocation).filter(ArticleLocation.url.in_(written)).delete(synchronize_session=False)
+    _copy(session, ArticleLocation.__tablename__, LOCATION_COLUMNS, (
+        [url, loc['country'], loc.get('region') or _NULL, loc['place'], loc.get('mentions', 1)]
+        for url in written for loc in articles[url][1]
+    ))
+    for url in written:
+        replace_media(session, url, articles[url][0].source, articles[url][2])
+    _copy(session, ArticleChange.__tablename__, CHANGE_COLUMNS, (
+        [url, 'upsert', now.isoformat(sep=' ')] for url in written
+    ))
+    return written
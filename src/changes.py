@@ -0,0 +1,128 @@
+import os
+import asyncio
+import logging
+import datetime
+import threading
+from sqlalchemy import func, insert, literal, select, text
+from src.db import Article, ArticleChange, render_payload
+from src.utils.serialize import dumps
+
+logger = logging.getLogger(__name__)
+
+CHANGES_PAGE_SIZE = int(os.getenv('ARTICLE_CHANGES_PAGE_SIZE', '500'))
+# Consumers further behind than this get resync=true and should reload /articles
+CHANGES_RETENTION_HOURS = int(os.getenv('ARTICLE_CHANGES_RETENTION_HOURS', '48'))
+
+def record_upsert(session, url):
+    session.add(ArticleChange(url=url, op='upsert', changed_at=datetime.datetime.utcnow()))
+
+def record_deletes(session, *criteria):
+    """Log a delete for every article matching criteria; call before deleting them."""
+    rows = select(Article.url, literal('delete'), literal(datetime.datetime.utcnow())).where(*criteria)
+    session.execute(insert(ArticleChange).from_select(['url', 'op', 'changed_at'], rows))
+
+def record_partition_deletes(conn, partitions):
+    # Called by drop_expired_partitions inside its transaction, before the DROP TABLEs
+    now = datetime.datetime.utcnow()
+    for name in partitions:
+        conn.execute(text(
+            f"INSERT INTO {ArticleChange.__tablename__} (url, op, changed_at) SELECT url, 'delete', :now FROM {name}"
+        ), {'now': now})
+
+def prune_changes(session, now=None):
+    now = now or datetime.datetime.utcnow()
+    cutoff = now - datetime.timedelta(hours=CHANGES_RETENTION_HOURS)
+    deleted = session.query(ArticleChange).filter(ArticleChange.changed_at < cutoff).delete(synchronize_session=False)
+    session.commit()
+    return deleted
+
+def _issued_seq(session):
+    # Highest seq ever handed out, which outlives the rows once pruning empties the log
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return session.execute(text(
+            "SELECT seq FROM sqlite_sequence WHERE name = :name"), {'name': ArticleChange.__tablename__}).scalar() or 0
+    if dialect == 'postgresql':
+        sequence = session.execute(text(
+            "SELECT pg_get_serial_sequence(:name, 'seq')"), {'name': ArticleChange.__tablename__}).scalar()
+        return session.execute(text(f"SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {sequence}")).scalar() or 0
+    return 0
+
+def latest_seq(session):
+    return session.query(func.max(ArticleChange.seq)).scalar() or _issued_seq(session)
+
+def read_changes(session, since, limit=CHANGES_PAGE_SIZE):
+    """Return (entries, next_seq, resync) for changes after since.
+
+    Each entry is (seq, op, json_bytes). Several changes to one URL within a
+    page collapse into the latest; upserts carry the current article payload.
+    """
+    rows = session.query(ArticleChange.seq, ArticleChange.url, ArticleChange.op).filter(
+        ArticleChange.seq > since).order_by(ArticleChange.seq).limit(limit).all()
+    oldest = session.query(func.min(ArticleChange.seq)).scalar()
+    if oldest is None:
+        # Pruning emptied the log: anything issued after since is gone
+        resync = bool(since and _issued_seq(session) > since)
+    else:
+        resync = bool(since and oldest > since + 1)
+    latest = {}
+    for seq, url, op in rows:
+        latest[url] = (seq, op)
+    upserted = [url for url, (_, op) in latest.items() if op == 'upsert']
+    articles = {}
+    if upserted:
+        articles = {
+            url: (payload, content, scraped_at)
+            for url, payload, content, scraped_at in session.query(Article.url, Article.payload, Article.content, Article.scraped_at)
+            .filter(Article.url.in_(upserted))
+        }
+    entries = []
+    for url, (seq, op) in sorted(latest.items(), key=lambda item: item[1][0]):
+        head = b'{"seq":' + str(seq).encode() + b',"url":' + dumps(url)
+        if op == 'upsert' and articles.get(url, (None,))[0] is not None:
+            entries.append((seq, op, head + b',"op":"upsert","article":' + render_payload(*articles[url]) + b'}'))
+        else:
+            # Deleted since (or never had a payload): report it gone
+            entries.append((seq, 'delete', head + b',"op":"delete"}'))
+    next_seq = rows[-1][0] if rows else since
+    return entries, next_seq, resync
+
+class ChangeWaiter:
+    """Lets an async stream sleep until this process commits a change (or a timeout)."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    async def wait(self, timeout):
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.event.clear()
+        return True
+
+_waiters = set()
+_waiters_lock = threading.Lock()
+
+def subscribe():
+    waiter = ChangeWaiter()
+    with _waiters_lock:
+        _waiters.add(waiter)
+    return waiter
+
+def unsubscribe(waiter):
+    with _waiters_lock:
+        _waiters.discard(waiter)
+
+def notify():
+    # Called from the writer thread after commit; wakes streams in this process.
+    # Streams served by other processes pick the change up on their next poll.
+    with _waiters_lock:
+        waiters = list(_waiters)
+    for waiter in waiters:
+        try:
+            waiter.loop.call_soon_threadsafe(waiter.event.set)
+        except RuntimeError:  # loop already closed
+            unsubscribe(waiter)
@@ -0,0 +1,142 @@
+import os
+import logging
+import datetime
+import threading
+from sqlalchemy.types import TypeDecorator, LargeBinary
+
+try:
+    import zstandard
+except ImportError:  # values are then stored uncompressed and still read back correctly
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+ZSTD_LEVEL = int(os.getenv('CONTENT_ZSTD_LEVEL', '3'))
+DICT_SIZE = 112 * 1024
+DICT_TRAIN_MIN_SAMPLES = 200
+DICT_TRAIN_MAX_SAMPLES = 2000
+
+# dict_id -> ZstdCompressionDict, loaded from the compression_dicts table on first use
+_dicts = {}
+_active_dict = None
+_loaded = False
+_lock = threading.Lock()
+_local = threading.local()
+
+def _register(dict_id, data):
+    global _active_dict
+    d = zstandard.ZstdCompressionDict(data)
+    _dicts[dict_id] = d
+    _active_dict = d
+
+def _load_dicts(reload=False):
+    global _loaded
+    if _loaded and not reload:
+        return
+    with _lock:
+        if _loaded and not reload:
+            return
+        from sqlalchemy import select
+        from src.db import engine, CompressionDict
+        try:
+            with engine.connect() as conn:
+                rows = conn.execute(select(CompressionDict.dict_id, CompressionDict.data).order_by(CompressionDict.created_at))
+                for dict_id, data in rows:
+                    _register(dict_id, data)
+        except Exception as e:
+            logger.warning(f"Could not load zstd dictionaries, compressing without one: {e}")
+        _loaded = True
+
+def _cache():
+    # zstd (de)compressor objects are not thread-safe; keep one per thread and dictionary
+    cache = getattr(_local, 'cache', None)
+    if cache is None:
+        cache = _local.cache = {}
+    return cache
+
+def _compressor():
+    d = _active_dict
+    key = ('c', d.dict_id() if d else 0)
+    cache = _cache()
+    if key not in cache:
+        cache[key] = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=d) if d else zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return cache[key]
+
+def _decompressor(dict_id):
+    key = ('d', dict_id)
+    cache = _cache()
+    if key not in cache:
+        if dict_id and dict_id not in _dicts:
+            # Trained by another process since we loaded
+            _load_dicts(reload=True)
+        if dict_id and dict_id not in _dicts:
+            raise ValueError(f"Unknown zstd dictionary id {dict_id}")
+        cache[key] = zstandard.ZstdDecompressor(dict_data=_dicts[dict_id]) if dict_id else zstandard.ZstdDecompressor()
+    return cache[key]
+
+def compress(data):
+    if zstandard is None:
+        return data
+    _load_dicts()
+    return _compressor().compress(data)
+
+def decompress(data):
+    if not data.startswith(ZSTD_MAGIC):
+        return data  # stored before compression was enabled, or without zstandard
+    if zstandard is None:
+        raise RuntimeError("zstd-compressed value found but 'zstandard' is not installed")
+    _load_dicts()
+    dict_id = zstandard.get_frame_parameters(data).dict_id
+    return _decompressor(dict_id).decompress(data)
+
+class CompressedBytes(TypeDecorator):
+    """Bytes column transparently zstd-compressed, using the latest trained dictionary."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return decompress(bytes(value)) if value is not None else None
+
+class CompressedText(CompressedBytes):
+    """Text column stored as zstd-compressed UTF-8; plain TEXT rows from older DBs still read."""
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress(value.encode('utf-8')) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        return decompress(bytes(value)).decode('utf-8')
+
+def train_dictionary(session, force=False):
+    """Train a zstd dictionary on recent article content and make it the active one.
+
+    Returns the new dict id, or None when zstandard is missing, a dictionary
+    already exists (unless force) or there are too few samples.
+    """
+    from src.db import Article, CompressionDict
+    if zstandard is None:
+        return None
+    _load_dicts()
+    if _dicts and not force:
+        return None
+    samples = [
+        content.encode('utf-8')
+        for (content,) in session.query(Article.content).filter(Article.content.isnot(None))
+        .order_by(Article.scraped_at.desc()).limit(DICT_TRAIN_MAX_SAMPLES)
+        if content
+    ]
+    if len(samples) < DICT_TRAIN_MIN_SAMPLES:
+        return None
+    d = zstandard.train_dictionary(DICT_SIZE, samples, level=ZSTD_LEVEL)
+    session.add(CompressionDict(dict_id=d.dict_id(), data=d.as_bytes(), created_at=datetime.datetime.utcnow()))
+    session.commit()
+    with _lock:
+        _register(d.dict_id(), d.as_bytes())
+    logger.info(f"Trained zstd dictionary {d.dict_id()} on {len(samples)} articles.")
+    return d.dict_id()
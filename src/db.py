@@ -1,15 +1,68 @@
 import os
 import json
+import logging
 import datetime
-from sqlalchemy import create_engine, Column, String, DateTime, Text
+from sqlalchemy import create_engine, inspect, select, func, text, Column, Index, Integer, Float, String, DateTime, Text, LargeBinary, Boolean
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, deferred, relationship, undefer, selectinload
+from src.utils.serialize import dumps
+from src.compression import CompressedText, ZSTD_MAGIC
+from src.partitions import PARTITIONING, ensure_partitions, configure as configure_partitions
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///articles.db')
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {})
+IS_SQLITE = DATABASE_URL.startswith('sqlite')
+# Connection pool for a server database (PostgreSQL); SQLite keeps SQLAlchemy's defaults.
+# Size it to API threadpool + fetch/writer threads; the async engine gets its own pool.
+POOL_OPTIONS = {} if IS_SQLITE else {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+    'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+    'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+    'pool_pre_ping': True,
+}
+engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if IS_SQLITE else {}, **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine for the API read path: asyncpg when DATABASE_URL is PostgreSQL
+# (override with ASYNC_DATABASE_URL). Without one, async handlers run their
+# sync queries in the threadpool instead.
+_scheme, _, _rest = DATABASE_URL.partition('://')
+ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL') or (
+    f'postgresql+asyncpg://{_rest}' if _scheme.split('+')[0] in ('postgresql', 'postgres') else None
+)
+ASYNC_CONNECT_ARGS = {
+    'command_timeout': float(os.getenv('DB_COMMAND_TIMEOUT', '30')),
+    # Short OLTP queries: JIT compilation costs more than it saves
+    'server_settings': {'application_name': 'disaster-news-api', 'jit': 'off'},
+}
+_async_sessionmaker = None
+_async_engine = None
+_async_unavailable = False
+
+def get_async_sessionmaker():
+    """Return an async_sessionmaker bound to the async engine, or None if there is no async driver."""
+    global _async_sessionmaker, _async_engine, _async_unavailable
+    if _async_sessionmaker is None and ASYNC_DATABASE_URL and not _async_unavailable:
+        try:
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+            _async_engine = create_async_engine(ASYNC_DATABASE_URL, connect_args=ASYNC_CONNECT_ARGS, **POOL_OPTIONS)
+        except ImportError as e:  # asyncpg (or greenlet) not installed
+            logger.warning(f"Async database driver unavailable, using the sync engine in the threadpool: {e}")
+            _async_unavailable = True
+            return None
+        _async_sessionmaker = async_sessionmaker(_async_engine, expire_on_commit=False)
+    return _async_sessionmaker
+
+async def dispose_async_engine():
+    global _async_sessionmaker, _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_sessionmaker = None
+
 class Article(Base):
     __tablename__ = 'articles'
     url = Column(String, primary_key=True, index=True)
@@ -17,14 +70,42 @@ class Article(Base):
     subtitle = Column(String)
     publication_date = Column(DateTime)
     author = Column(String)
-    content = Column(Text)
+    # zstd-compressed and deferred: only loaded (and decompressed) when accessed
+    content = deferred(Column(CompressedText))
     tags = Column(Text)  # JSON string
-    media_urls = Column(Text)  # JSON string
+    # JSON string on rows stored before the media index; newer rows reference media through article_media
+    media_urls = Column(Text)
     related_articles = Column(Text)  # JSON string
     scraped_at = Column(DateTime, default=datetime.datetime.utcnow)
     keywords = Column(Text)  # JSON string
+    # RelevanceScorer output in [0, 1); NULL for rows stored before scoring existed
+    relevance = Column(Float)
+    locations = Column(Text)  # JSON string; also indexed row by row in article_locations
+    # Change detection for re-scrapes: sha256 of the raw page and the HTTP validators
+    content_hash = Column(String)
+    etag = Column(String)
+    last_modified = Column(String)
+    # Re-check bookkeeping for refresh.py: the source key, the last conditional
+    # re-fetch, and how many re-fetches found new content
+    source = Column(String)
+    checked_at = Column(DateTime)
+    check_count = Column(Integer, default=0)
+    change_count = Column(Integer, default=0)
+    # Kept (non-boilerplate) images, in page order
+    media = relationship(
+        'Media', secondary='article_media',
+        primaryjoin='and_(Article.url == foreign(ArticleMedia.url), ArticleMedia.kept == True)',
+        secondaryjoin='Media.id == foreign(ArticleMedia.media_id)',
+        order_by='ArticleMedia.position', viewonly=True,
+    )
+    # to_dict() minus content and scraped_at as plain JSON bytes, built on write; see render_payload.
+    # content is only stored (compressed) in its own column.
+    payload = Column(LargeBinary)
 
-    def to_dict(self):
+    def to_dict(self, media_urls=None):
+        # Writers pass media_urls: the media relationship is not loaded for rows being written
+        if media_urls is None:
+            media_urls = json.loads(self.media_urls) if self.media_urls else [m.url for m in self.media]
         return {
             "url": self.url,
             "headline": self.headline,
@@ -33,11 +114,145 @@ class Article(Base):
             "author": self.author,
             "content": self.content,
             "tags": json.loads(self.tags) if self.tags else [],
-            "media_urls": json.loads(self.media_urls) if self.media_urls else [],
+            "media_urls": media_urls,
             "related_articles": json.loads(self.related_articles) if self.related_articles else [],
             "scraped_at": self.scraped_at.isoformat() if self.scraped_at else None,
             "keywords": json.loads(self.keywords) if self.keywords else [],
+            "relevance": self.relevance,
+            "locations": json.loads(self.locations) if self.locations else [],
         }
 
-# Create tables
-Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    def build_payload(self, media_urls=None):
+        data = self.to_dict(media_urls)
+        del data['content'], data['scraped_at']
+        return dumps(data)
+
+def render_payload(payload, content, scraped_at):
+    # scraped_at is kept out of the stored payload so touch_article never rewrites it
+    stamp = b'"' + scraped_at.isoformat().encode() + b'"' if scraped_at else b'null'
+    return payload[:-1] + b',"content":' + dumps(content) + b',"scraped_at":' + stamp + b'}'
+
+class ArticleLocation(Base):
+    # One row per place an article names, so /articles?country= is an index lookup rather than a text scan.
+    # No foreign key: articles may be a partition view; rows left behind by deletes are pruned by the job.
+    __tablename__ = 'article_locations'
+    __table_args__ = (
+        Index('ix_article_locations_country_url', 'country', 'url'),
+        Index('ix_article_locations_region_url', 'region', 'url'),
+    )
+    id = Column(Integer, primary_key=True)
+    url = Column(String, nullable=False, index=True)
+    country = Column(String(2), nullable=False)  # ISO 3166-1 alpha-2
+    region = Column(String)
+    place = Column(String, nullable=False)
+    mentions = Column(Integer, default=1)
+
+class Media(Base):
+    # Every image URL stored once; ref_count is the number of article_media rows pointing at it
+    __tablename__ = 'media'
+    id = Column(Integer, primary_key=True)
+    url = Column(String, nullable=False, unique=True)
+    ref_count = Column(Integer, default=0)
+    first_seen = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ArticleMedia(Base):
+    # An article's images by media id, boilerplate included (kept=False) so media.py can keep learning it.
+    # No foreign key, as with article_locations; orphans are pruned by the job.
+    __tablename__ = 'article_media'
+    __table_args__ = (
+        Index('ix_article_media_source_media', 'source', 'media_id'),
+    )
+    id = Column(Integer, primary_key=True)
+    url = Column(String, nullable=False, index=True)
+    source = Column(String)
+    media_id = Column(Integer, nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    kept = Column(Boolean, nullable=False, default=True)
+
+class CompressionDict(Base):
+    __tablename__ = 'compression_dicts'
+    dict_id = Column(Integer, primary_key=True, autoincrement=False)
+    data = Column(LargeBinary)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ArticleChange(Base):
+    # Append-only change log; seq is the cursor for /articles/changes and /articles/stream
+    __tablename__ = 'article_changes'
+    __table_args__ = {'sqlite_autoincrement': True}  # never reuse a seq, even after pruning
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    url = Column(String, nullable=False)
+    op = Column(String, nullable=False)  # 'upsert' or 'delete'
+    changed_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+class SourceBreaker(Base):
+    # Circuit breaker state per source (see scraper/circuit.py), saved by the job so it outlives the process
+    __tablename__ = 'source_breakers'
+    name = Column(String, primary_key=True)
+    state = Column(String, nullable=False)
+    failures = Column(Integer, default=0)
+    opened_at = Column(DateTime)
+    cooldown_seconds = Column(Float)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class JobLease(Base):
+    __tablename__ = 'job_leases'
+    name = Column(String, primary_key=True)
+    holder = Column(String)
+    expires_at = Column(DateTime)
+
+def add_missing_columns():
+    # create_all does not alter existing tables; add nullable columns introduced since the DB was created
+    # and, on PostgreSQL, turn TEXT columns compressed since then into bytea (SQLite stores either as is)
+    inspector = inspect(engine)
+    views = set(inspector.get_view_names())
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name) or table.name in views:
+            # A partitioned articles view is migrated per partition by ensure_partitions
+            continue
+        existing = {c['name']: c['type'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                if (engine.dialect.name == 'postgresql' and isinstance(column.type, CompressedText)
+                        and not isinstance(existing[column.name], LargeBinary)):
+                    with engine.begin() as conn:
+                        conn.execute(text(
+                            f"ALTER TABLE {table.name} ALTER COLUMN {column.name} TYPE bytea "
+                            f"USING convert_to({column.name}, 'UTF8')"
+                        ))
+                    logger.info(f"Converted {table.name}.{column.name} to bytea for compressed values.")
+                continue
+            col_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+
+def rebuild_stale_payloads(session, batch_size=500):
+    """Rewrite payloads stored zstd-compressed with content inside them; returns how many."""
+    stale = session.scalars(select(Article.url).where(func.substr(Article.payload, 1, len(ZSTD_MAGIC)) == ZSTD_MAGIC)).all()
+    for start in range(0, len(stale), batch_size):
+        articles = session.query(Article).options(undefer(Article.content), selectinload(Article.media)).filter(
+            Article.url.in_(stale[start:start + batch_size]))
+        for article in articles:
+            article.payload = article.build_payload()
+        session.commit()
+    return len(stale)
+
+_initialized = False
+
+def init_db():
+    """Create tables and apply additive migrations. Entry points call this; importing src.db stays side-effect free."""
+    global _initialized
+    if _initialized:
+        return
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    if PARTITIONING:
+        configure_partitions(engine)
+        ensure_partitions(engine, Article.__table__)
+    session = SessionLocal()
+    try:
+        rebuilt = rebuild_stale_payloads(session)
+    finally:
+        session.close()
+    if rebuilt:
+        logger.info(f"Rebuilt {rebuilt} article payloads stored in the old compressed format.")
+    _initialized = True 
\ No newline at end of file
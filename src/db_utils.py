@@ -1,8 +1,36 @@
 import datetime
 import json
-from .db import Article
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
+from .db import Article, ArticleLocation, ArticleMedia, JobLease
+from .utils.clean import to_naive_utc
+from .changes import record_upsert, notify
+from .media import prepare_media, replace_media, media_ids, hide_boilerplate
 
-def upsert_article(session, data):
+def article_values(data):
+    """Column values for a parsed article dict, minus url and scraped_at; shared with bulk.copy_upsert_articles."""
+    return {
+        'headline': data.get('headline'),
+        'subtitle': data.get('subtitle'),
+        'publication_date': to_naive_utc(datetime.datetime.fromisoformat(data['publication_date'])) if data.get('publication_date') else None,
+        'author': data.get('author'),
+        'content': data.get('content'),
+        'tags': json.dumps(data.get('tags', [])),
+        # Images are stored through the media index (media.py); this clears the legacy JSON column
+        'media_urls': None,
+        'related_articles': json.dumps(data.get('related_articles', [])),
+        'keywords': json.dumps(data.get('keywords', [])),
+        'relevance': data.get('relevance'),
+        'locations': json.dumps(data.get('locations', [])),
+        'content_hash': data.get('content_hash'),
+        'etag': data.get('etag'),
+        'last_modified': data.get('last_modified'),
+        'source': data.get('source'),
+    }
+
+def upsert_article(session, data, commit=True):
+    # commit=False leaves the commit (and change notification) to a batching caller
     url = data['article_url']
     now = datetime.datetime.utcnow()
     article = session.query(Article).filter_by(url=url).first()
@@ -11,30 +39,133 @@ def upsert_article(session, data):
         if (now - article.scraped_at).total_seconds() < 24*3600:
             return False  # Already fresh
         # Update fields
-        article.headline = data.get('headline')
-        article.subtitle = data.get('subtitle')
-        article.publication_date = datetime.datetime.fromisoformat(data['publication_date']) if data.get('publication_date') else None
-        article.author = data.get('author')
-        article.content = data.get('content')
-        article.tags = json.dumps(data.get('tags', []))
-        article.media_urls = json.dumps(data.get('media_urls', []))
-        article.related_articles = json.dumps(data.get('related_articles', []))
-        article.keywords = json.dumps(data.get('keywords', []))
+        for name, value in article_values(data).items():
+            setattr(article, name, value)
         article.scraped_at = now
     else:
-        article = Article(
-            url=url,
-            headline=data.get('headline'),
-            subtitle=data.get('subtitle'),
-            publication_date=datetime.datetime.fromisoformat(data['publication_date']) if data.get('publication_date') else None,
-            author=data.get('author'),
-            content=data.get('content'),
-            tags=json.dumps(data.get('tags', [])),
-            media_urls=json.dumps(data.get('media_urls', [])),
-            related_articles=json.dumps(data.get('related_articles', [])),
-            keywords=json.dumps(data.get('keywords', [])),
-            scraped_at=now
-        )
-        session.add(article)
+        article = Article(url=url, scraped_at=now, **article_values(data))
+    media_urls, media_refs = prepare_media(session, data.get('source'), data.get('media_urls'))
+    session.add(article)
+    article.payload = article.build_payload(media_urls)
+    replace_locations(session, url, data.get('locations', []))
+    replace_media(session, url, data.get('source'), media_refs)
+    record_upsert(session, url)
+    if commit:
+        session.commit()
+        notify()
+    return True
+
+def replace_locations(session, url, locations):
+    session.query(ArticleLocation).filter_by(url=url).delete(synchronize_session=False)
+    session.add_all(ArticleLocation(url=url, **location) for location in locations)
+
+def prune_locations(session):
+    """Delete location rows whose article is gone; returns the number deleted."""
+    deleted = session.query(ArticleLocation).filter(
+        ArticleLocation.url.notin_(select(Article.url))
+    ).delete(synchronize_session=False)
+    session.commit()
+    return deleted
+
+def touch_article(session, data, commit=True):
+    """Mark an unchanged article as freshly scraped without rewriting its fields."""
+    values = {Article.scraped_at: datetime.datetime.utcnow()}
+    if data.get('etag'):
+        values[Article.etag] = data['etag']
+    if data.get('last_modified'):
+        values[Article.last_modified] = data['last_modified']
+    updated = session.query(Article).filter_by(url=data['article_url']).update(values, synchronize_session=False)
+    if commit:
+        session.commit()
+    return bool(updated)
+
+# Fields that make up the story; a re-fetch that only changed markup or the relevance score is not an update
+# (images are compared separately, as kept media urls)
+STORY_FIELDS = ('headline', 'subtitle', 'publication_date', 'author', 'content', 'tags')
+
+def claim_rechecks(session, urls, now=None):
+    """Stamp checked_at on articles about to be re-checked, so a failed fetch waits a full interval too."""
+    now = now or datetime.datetime.utcnow()
+    session.query(Article).filter(Article.url.in_(urls)).update({Article.checked_at: now}, synchronize_session=False)
+    session.commit()
+
+def apply_recheck(session, data):
+    """Record a re-check of a stored article; returns True if the story changed.
+
+    Unlike upsert_article this keeps scraped_at, so re-checks do not extend the
+    article's time in the window.
+    """
+    url = data['article_url']
+    article = session.query(Article).options(undefer(Article.content)).filter_by(url=url).first()
+    if article is None:
+        return False  # pruned since it was picked
+    article.check_count = (article.check_count or 0) + 1
+    for name in ('etag', 'last_modified', 'content_hash'):
+        if data.get(name):
+            setattr(article, name, data[name])
+    if data.get('unchanged'):
+        return False
+    values = article_values(data)
+    source = article.source or data.get('source')
+    media_urls, media_refs = prepare_media(session, source, data.get('media_urls'))
+    # Compared unfiltered: a change in the source's learned boilerplate is not a change to the story
+    if article.media_urls:
+        same_media = json.loads(article.media_urls) == (data.get('media_urls') or [])
+    else:
+        same_media = media_ids(session, url) == [media_id for media_id, _ in media_refs]
+    if same_media and all(getattr(article, name) == values[name] for name in STORY_FIELDS):
+        return False
+    for name, value in values.items():
+        setattr(article, name, value)
+    article.change_count = (article.change_count or 0) + 1
+    article.payload = article.build_payload(media_urls)
+    replace_locations(session, url, data.get('locations', []))
+    replace_media(session, url, source, media_refs)
+    record_upsert(session, url)
+    return True
+
+def refilter_media(session):
+    """Rebuild the payloads of stored articles showing images since learned as boilerplate; returns how many."""
+    urls = []
+    for source in session.scalars(select(ArticleMedia.source).where(ArticleMedia.source.isnot(None)).distinct()).all():
+        urls.extend(hide_boilerplate(session, source))
+    for article in session.query(Article).options(undefer(Article.content)).filter(Article.url.in_(urls)):
+        article.payload = article.build_payload()
+        record_upsert(session, article.url)
+    session.commit()
+    return len(urls)
+
+def acquire_lease(session, name, holder, ttl_seconds):
+    """Take or renew the named lease; returns True if holder owns it afterwards.
+
+    A single conditional UPDATE (or the INSERT for a new lease) decides the
+    winner, so this is safe across processes on SQLite and Postgres.
+    """
+    now = datetime.datetime.utcnow()
+    expires_at = now + datetime.timedelta(seconds=ttl_seconds)
+    updated = session.query(JobLease).filter(
+        JobLease.name == name,
+        (JobLease.holder == holder) | (JobLease.expires_at < now),
+    ).update({JobLease.holder: holder, JobLease.expires_at: expires_at}, synchronize_session=False)
+    if updated:
+        session.commit()
+        return True
+    try:
+        session.add(JobLease(name=name, holder=holder, expires_at=expires_at))
+        session.commit()
+        return True
+    except IntegrityError:
+        session.rollback()
+        return False
+
+def lease_holder(session, name):
+    return session.query(JobLease.holder).filter_by(name=name).scalar()
+
+def release_lease(session, name, holder, hold_until=None):
+    """Give up the lease, or with hold_until keep it (unrenewed) until then."""
+    query = session.query(JobLease).filter_by(name=name, holder=holder)
+    if hold_until is None:
+        query.delete(synchronize_session=False)
+    else:
+        query.update({JobLease.expires_at: hold_until}, synchronize_session=False)
     session.commit()
-    return True 
\ No newline at end of file
@@ -0,0 +1,457 @@
+import os
+import time
+import socket
+import logging
+import threading
+import json
+import datetime
+import collections
+from urllib.parse import urlsplit
+from src.db import engine, SessionLocal, Article, SourceBreaker, init_db
+from src.metrics import metrics
+from src.partitions import PARTITIONING, ensure_partitions, drop_expired_partitions
+from src.db_utils import upsert_article, touch_article, claim_rechecks, apply_recheck, prune_locations, refilter_media, acquire_lease, lease_holder, release_lease
+from src.article_cache import ArticleCache
+from src.bulk import BULK_COPY, copy_upsert_articles
+from src.media import prune_media
+from src.compression import train_dictionary
+from src.changes import record_deletes, record_partition_deletes, prune_changes, notify
+from src.refresh import REFRESH_BUDGET, due_articles
+from src import profiling
+from src.scraper.pipeline import find_candidates, scrape_articles
+from src.scraper.circuit import get_breaker
+
+logger = logging.getLogger(__name__)
+
+# None means scraper_config.ALL_SCRAPERS, loaded on the first run: building the
+# registry imports bs4, requests and dateparser, which API workers may never need
+SCRAPERS = None
+
+def get_scrapers():
+    if SCRAPERS is not None:
+        return SCRAPERS
+    from src.scraper.scraper_config import ALL_SCRAPERS
+    return ALL_SCRAPERS
+
+CACHE_WINDOW_HOURS = 24
+# In-memory expiring index: {url: publication_date}
+article_cache = ArticleCache(CACHE_WINDOW_HOURS)
+# (scored_at, keywords) of articles scored below MIN_RELEVANCE in the window: the
+# non-relevant side of the IDF background. In memory only, so after a restart
+# IDF starts from the stored articles alone.
+rejected_keywords = collections.deque()
+
+def load_cache_from_db():
+    session = SessionLocal()
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=CACHE_WINDOW_HOURS)
+    rows = session.query(Article.url, Article.publication_date).filter(Article.scraped_at >= cutoff)
+    cache = ArticleCache(CACHE_WINDOW_HOURS)
+    for url, pub_date in rows:
+        if pub_date:
+            cache[url] = pub_date
+    session.close()
+    logger.info(f"Loaded {len(cache)} articles into cache from DB.")
+    return cache
+
+def prune_cache_and_db(now=None):
+    now = now or datetime.datetime.utcnow()
+    removed = article_cache.prune(now)
+    if removed:
+        logger.info(f"Pruned {removed} articles from cache.")
+    session = SessionLocal()
+    prune_changes(session, now)
+    # Also prune DB
+    if PARTITIONING:
+        # Scrape days past the window go as whole partitions; the publication
+        # date rule below still applies to the rows of the days kept
+        if drop_expired_partitions(engine, Article.__table__, now, before_drop=record_partition_deletes):
+            notify()
+    cutoff = now - datetime.timedelta(hours=CACHE_WINDOW_HOURS)
+    record_deletes(session, Article.publication_date < cutoff)
+    deleted = session.query(Article).filter(Article.publication_date < cutoff).delete()
+    session.commit()
+    if deleted:
+        notify()
+        logger.info(f"Pruned {deleted} articles from DB (older than {CACHE_WINDOW_HOURS}h).")
+    # Location rows of every article deleted so far, whichever way it went
+    prune_locations(session)
+    deleted = prune_media(session)
+    if deleted:
+        logger.info(f"Pruned {deleted} unreferenced media URLs.")
+    rebuilt = refilter_media(session)
+    if rebuilt:
+        notify()
+        logger.info(f"Rebuilt {rebuilt} article payloads to hide newly learned boilerplate images.")
+    session.close()
+
+# Only one process (API worker or standalone scraper) runs the job at a time
+SCRAPE_LEASE = 'scrape_all'
+LEASE_TTL_SECONDS = int(os.getenv('SCRAPE_LEASE_SECONDS', '900'))
+LEASE_HOLDER = f"{socket.gethostname()}:{os.getpid()}"
+# Every process schedules the job at this interval, each at its own offset. A
+# finished run keeps the lease until its slot is over, so the other processes'
+# triggers in the same slot skip instead of running the job again.
+SCRAPE_INTERVAL_MINUTES = float(os.getenv('SCRAPE_INTERVAL_MINUTES', '10'))
+# The lease is per process; this stops /scrape-now overlapping the scheduler thread
+_job_lock = threading.Lock()
+
+def renew_lease():
+    session = SessionLocal()
+    try:
+        return acquire_lease(session, SCRAPE_LEASE, LEASE_HOLDER, LEASE_TTL_SECONDS)
+    finally:
+        session.close()
+
+def _take_lease():
+    """Acquire the lease for a run; returns (acquired, whether another process held it last)."""
+    session = SessionLocal()
+    try:
+        previous = lease_holder(session, SCRAPE_LEASE)
+        return acquire_lease(session, SCRAPE_LEASE, LEASE_HOLDER, LEASE_TTL_SECONDS), previous != LEASE_HOLDER
+    finally:
+        session.close()
+
+# Rows looked up or written per session; each batch gets a fresh session that is
+# cleared after commit, so the identity map never holds a whole job's articles
+SCRAPE_BATCH_SIZE = int(os.getenv('SCRAPE_BATCH_SIZE', '50'))
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# A run always ends inside its 10-minute slot: past this, remaining sources and
+# urls are skipped (logged and counted in scrape_*_skipped_total), leaving time for cleanup
+JOB_DEADLINE_SECONDS = float(os.getenv('SCRAPE_JOB_DEADLINE_SECONDS', '540'))
+
+def _load_breakers(names):
+    session = SessionLocal()
+    try:
+        for row in session.query(SourceBreaker).filter(SourceBreaker.name.in_(names)):
+            get_breaker(row.name).restore(row.state, row.failures, row.opened_at, row.cooldown_seconds)
+    finally:
+        session.close()
+
+def _save_breaker(name):
+    state = get_breaker(name).snapshot()
+    session = SessionLocal()
+    try:
+        session.merge(SourceBreaker(
+            name=name, state=state['state'], failures=state['failures'], opened_at=state['opened_at'],
+            cooldown_seconds=state['cooldown'], updated_at=datetime.datetime.utcnow(),
+        ))
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"{name}: Failed to save circuit breaker state: {e}")
+    finally:
+        session.close()
+
+def _stop_check(breaker, deadline):
+    # Polled by the pipeline; the reason doubles as the metrics label
+    def stop():
+        if time.monotonic() > deadline:
+            return 'deadline'
+        if breaker.rejecting():
+            return 'circuit_open'
+        return None
+    return stop
+
+def _select_to_scrape(candidates, now):
+    """Drop candidates already fresh in the cache or DB; returns (urls, validators) for the rest."""
+    to_scrape = []
+    validators = {}
+    stale = (url for url, _ in candidates if not article_cache.is_fresh(url, now))
+    for batch in _batches(stale, SCRAPE_BATCH_SIZE):
+        session = SessionLocal()
+        try:
+            stored = {
+                row.url: row for row in session.query(
+                    Article.url, Article.scraped_at, Article.publication_date, Article.etag, Article.last_modified, Article.content_hash
+                ).filter(Article.url.in_(batch))
+            }
+        finally:
+            session.close()
+        for url in batch:
+            article = stored.get(url)
+            if article and (now - article.scraped_at).total_seconds() < CACHE_WINDOW_HOURS * 3600:
+                # Update cache if missing
+                if url not in article_cache and article.publication_date:
+                    article_cache[url] = article.publication_date
+                continue
+            if article:
+                validators[url] = (article.etag, article.last_modified, article.content_hash)
+            to_scrape.append(url)
+    return to_scrape, validators
+
+def _score_batch(name, batch, scorer, now):
+    """Set 'relevance' on the parsed articles in batch; returns the batch minus those below MIN_RELEVANCE."""
+    from src.scraper.relevance import MIN_RELEVANCE
+    scored = [data for data in batch if 'term_counts' in data]
+    if not scored:
+        return batch
+    kept = [data for data in batch if 'term_counts' not in data]
+    rejected = 0
+    for data, score in zip(scored, scorer.score(scored)):
+        del data['term_counts']
+        if score < MIN_RELEVANCE:
+            # Remember it for the window so the next runs don't fetch it again
+            article_cache[data['article_url']] = now
+            rejected_keywords.append((now, data.get('keywords') or []))
+            rejected += 1
+            continue
+        data['relevance'] = round(float(score), 4)
+        kept.append(data)
+    if rejected:
+        logger.info(f"{name}: {rejected} articles below relevance {MIN_RELEVANCE}, not stored.")
+    return kept
+
+def _write_batch(name, batch):
+    """Persist one batch of scrape results in its own session; returns (new, unchanged) counts."""
+    new_count = 0
+    unchanged_count = 0
+    cached = {}
+    session = SessionLocal()
+    try:
+        parsed = []
+        for data in batch:
+            if data.get('unchanged'):
+                # Same page as last time: only bump scraped_at
+                if touch_article(session, data, commit=False):
+                    unchanged_count += 1
+            else:
+                parsed.append(data)
+        if BULK_COPY:
+            written = set(copy_upsert_articles(session, parsed))
+        else:
+            written = {data['article_url'] for data in parsed if upsert_article(session, data, commit=False)}
+        new_count = len(written)
+        for data in parsed:
+            if data['article_url'] in written and data.get('publication_date'):
+                try:
+                    cached[data['article_url']] = datetime.datetime.fromisoformat(data['publication_date'])
+                except Exception:
+                    pass
+        session.commit()
+        session.expunge_all()
+    except Exception as e:
+        # Unsaved articles are picked up again on the next run
+        session.rollback()
+        logger.warning(f"{name}: Failed to store a batch of {len(batch)} articles: {e}")
+        return 0, 0
+    finally:
+        session.close()
+    # Only cache what was committed
+    for url, pub_date in cached.items():
+        article_cache[url] = pub_date
+    if new_count:
+        notify()
+    return new_count, unchanged_count
+
+def _write_rechecks(name, batch):
+    """Persist re-check results in their own session; returns (changed, checked) counts."""
+    changed = 0
+    session = SessionLocal()
+    try:
+        for data in batch:
+            if apply_recheck(session, data):
+                changed += 1
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"{name}: Failed to store {len(batch)} re-checked articles: {e}")
+        return 0, 0
+    finally:
+        session.close()
+    if changed:
+        notify()
+    return changed, len(batch)
+
+def _get_scorer(scorers, keywords, now):
+    """The job's scorer for a keyword list, with IDF from the articles stored and rejected in the window."""
+    if keywords not in scorers:
+        from src.scraper.relevance import RelevanceScorer
+        cutoff = now - datetime.timedelta(hours=CACHE_WINDOW_HOURS)
+        while rejected_keywords and rejected_keywords[0][0] < cutoff:
+            rejected_keywords.popleft()
+        session = SessionLocal()
+        try:
+            rows = session.query(Article.keywords).filter(Article.scraped_at >= cutoff)
+            scorers[keywords] = RelevanceScorer(
+                keywords, (json.loads(matched) for (matched,) in rows if matched),
+                background=[matched for _, matched in rejected_keywords])
+        finally:
+            session.close()
+    return scorers[keywords]
+
+def _refresh_articles(scorers, now, deadline):
+    """Re-check the stored articles that are due (see refresh.py); returns how many had updates."""
+    session = SessionLocal()
+    try:
+        due = due_articles(session, now)
+    finally:
+        session.close()
+    if not due:
+        return 0
+    scrapers = get_scrapers()
+    hosts = {urlsplit(scraper.homepage_url).netloc: name for name, scraper in scrapers.items()}
+    by_source = {}
+    for item in due:
+        # Rows stored before articles.source existed are matched by host
+        name = item.source if item.source in scrapers else hosts.get(urlsplit(item.url).netloc)
+        if name:
+            by_source.setdefault(name, []).append(item)
+    changed = 0
+    checked = 0
+    for name, items in by_source.items():
+        breaker = get_breaker(name)
+        if time.monotonic() > deadline or breaker.rejecting():
+            continue
+        scraper = scrapers[name]
+        scorer = _get_scorer(scorers, tuple(scraper.keywords), now)
+        urls = [item.url for item in items]
+        session = SessionLocal()
+        try:
+            claim_rechecks(session, urls, now)
+        finally:
+            session.close()
+        # Conditional requests: a 304 or an identical page skips parsing entirely
+        validators = {item.url: item.validators for item in items}
+        results = scrape_articles(name, scraper, urls, validators, stop=_stop_check(breaker, deadline))
+        for batch in _batches(results, SCRAPE_BATCH_SIZE):
+            with profiling.stage(name, 'write'):
+                batch_changed, batch_checked = _write_rechecks(name, _score_batch(name, batch, scorer, now))
+            changed += batch_changed
+            checked += batch_checked
+        _save_breaker(name)
+    metrics.inc('scrape_rechecks_total', changed, result='changed')
+    metrics.inc('scrape_rechecks_total', checked - changed, result='unchanged')
+    logger.info(f"Re-checked {checked} of {len(due)} due articles; {changed} had updates.")
+    return changed
+
+def _log_cache_stats(name, before, after):
+    # This run's share of the source's cumulative HTTP cache counters
+    delta = {key: after[key] - before[key] for key in ('hit', 'revalidated', 'miss', 'bytes_saved')}
+    lookups = delta['hit'] + delta['revalidated'] + delta['miss']
+    if lookups:
+        served = delta['hit'] + delta['revalidated']
+        logger.info(f"{name}: HTTP cache served {served}/{lookups} requests ({served / lookups:.0%}, "
+                    f"{delta['revalidated']} revalidated), {delta['bytes_saved'] / 1e6:.1f} MB not downloaded.")
+
+def _run_scrape():
+    now = datetime.datetime.utcnow()
+    started = time.monotonic()
+    deadline = started + JOB_DEADLINE_SECONDS
+    if PARTITIONING:
+        # Roll the insert trigger over to today's partition
+        ensure_partitions(engine, Article.__table__, now.date())
+    total_new = 0
+    prune_cache_and_db(now)
+    # Imported here: requests is only needed once a job runs
+    from src.scraper.http_cache import get_http_cache
+    http_cache = get_http_cache()
+    # One scorer per keyword list, shared by every source (see _get_scorer)
+    scorers = {}
+    sources = list(get_scrapers().items())
+    _load_breakers([name for name, _ in sources])
+    for i, (name, scraper) in enumerate(sources):
+        if time.monotonic() > deadline:
+            skipped = [name for name, _ in sources[i:]]
+            for skipped_name in skipped:
+                metrics.inc('scrape_sources_skipped_total', source=skipped_name, reason='deadline')
+            logger.warning(f"Job deadline of {JOB_DEADLINE_SECONDS:.0f}s reached; skipping {len(skipped)} sources: {', '.join(skipped)}.")
+            break
+        if not renew_lease():
+            logger.warning("Lost the scrape lease mid-job; stopping.")
+            break
+        breaker = scraper.breaker
+        if breaker.rejecting():
+            metrics.inc('scrape_sources_skipped_total', source=name, reason='circuit_open')
+            logger.info(f"{name}: Circuit open, skipping this run.")
+            continue
+        stop = _stop_check(breaker, deadline)
+        cache_before = http_cache.stats(name) if http_cache else None
+        logger.info(f"Visiting {name} for latest articles...")
+        # At most MAX_ARTICLES_PER_SOURCE candidates, newest first
+        articles = find_candidates(name, scraper, stop=stop)
+        profiling.snapshot(name, 'candidates')
+        logger.info(f"Found {len(articles)} candidate articles on {name}.")
+        to_scrape, validators = _select_to_scrape(articles, now)
+        scorer = _get_scorer(scorers, tuple(scraper.keywords), now)
+        new_count = 0
+        unchanged_count = 0
+        # Writer stage: fetch/parse run in the pipeline, persistence stays on this thread
+        for batch in _batches(scrape_articles(name, scraper, to_scrape, validators, stop=stop), SCRAPE_BATCH_SIZE):
+            with profiling.stage(name, 'write'):
+                stored, unchanged = _write_batch(name, _score_batch(name, batch, scorer, now))
+            new_count += stored
+            unchanged_count += unchanged
+        profiling.snapshot(name, 'articles')
+        if unchanged_count:
+            logger.info(f"{unchanged_count} unchanged articles refreshed without re-extraction for {name}.")
+        logger.info(f"{new_count} new articles scraped and stored for {name}.")
+        metrics.inc('scrape_articles_stored_total', new_count, source=name)
+        if http_cache:
+            _log_cache_stats(name, cache_before, http_cache.stats(name))
+        _save_breaker(name)
+        total_new += new_count
+    # Leftover time goes to re-checking young and volatile stories, within REFRESH_BUDGET fetches
+    if REFRESH_BUDGET and time.monotonic() < deadline and renew_lease():
+        _refresh_articles(scorers, datetime.datetime.utcnow(), deadline)
+    if time.monotonic() > deadline:
+        metrics.inc('scrape_job_deadline_exceeded_total')
+    session = SessionLocal()
+    # Cleanup: remove articles older than 24h from DB (partitions expire in prune_cache_and_db)
+    deleted = 0
+    if not PARTITIONING:
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=CACHE_WINDOW_HOURS)
+        record_deletes(session, Article.scraped_at < cutoff)
+        deleted = session.query(Article).filter(Article.scraped_at < cutoff).delete()
+        session.commit()
+        if deleted:
+            notify()
+    total_articles = session.query(Article).count()
+    logger.info(f"Scraping job complete. {total_new} new articles scraped. {deleted} old articles deleted. Total articles in DB: {total_articles}.")
+    # One-off: once enough news text exists, train the zstd dictionary used for content
+    train_dictionary(session)
+    session.close()
+    prune_cache_and_db()
+    metrics.inc('scrape_jobs_total')
+    metrics.set('scrape_job_duration_seconds', round(time.monotonic() - started, 1))
+
+def warm_cache():
+    global article_cache
+    article_cache = load_cache_from_db()
+
+def scrape_all(profile=None):
+    """Run one scrape job if this process gets the lease; profile overrides SCRAPE_PROFILE (see profiling.py)."""
+    init_db()
+    if not _job_lock.acquire(blocking=False):
+        logger.info("Scraping job already running in this process, skipping.")
+        return False
+    try:
+        acquired, handed_over = _take_lease()
+        if not acquired:
+            logger.info("Scrape lease held by another process, or its run in this slot is done; skipping.")
+            return False
+        if handed_over:
+            # Another process may have written since this one last ran; start from the DB
+            warm_cache()
+        logger.info("Starting scheduled scraping job...")
+        slot_end = datetime.datetime.utcnow() + datetime.timedelta(minutes=SCRAPE_INTERVAL_MINUTES)
+        try:
+            with profiling.profile_job(profiling.PROFILE if profile is None else profile):
+                _run_scrape()
+        finally:
+            session = SessionLocal()
+            # Past slot_end (a run longer than the interval) this frees the lease at once
+            release_lease(session, SCRAPE_LEASE, LEASE_HOLDER, hold_until=slot_end)
+            session.close()
+        return True
+    finally:
+        _job_lock.release()
@@ -0,0 +1,113 @@
+import os
+import re
+import time
+import threading
+from sqlalchemy import select, func
+from src.db import Article, Media, ArticleMedia
+
+# Media index. Every image URL is stored once in media and articles point at
+# it through article_media, instead of each row carrying its own JSON list.
+# Sources repeat the same logos, bylines and share buttons on every page:
+# an image found on more than MEDIA_BOILERPLATE_SHARE of a source's stored
+# articles (and at least MEDIA_BOILERPLATE_MIN_PAGES of them) is learned as
+# that source's boilerplate and left out of payloads. The job's prune pass
+# also hides newly learned boilerplate in articles stored before it was
+# learned (hide_boilerplate); an image that stops being boilerplate only
+# shows again in articles written after that. URLs matching
+# MEDIA_IGNORE_PATTERN (tracking pixels, icons, inline data) are never stored.
+MEDIA_IGNORE_PATTERN = os.getenv(
+    'MEDIA_IGNORE_PATTERN',
+    r'^data:|\.svg(\?|$)|favicon|sprite|spacer|pixel|placeholder|blank\.gif|/logos?[/._-]|/icons?[/._-]|avatar',
+)
+IGNORE_MEDIA_RE = re.compile(MEDIA_IGNORE_PATTERN, re.IGNORECASE) if MEDIA_IGNORE_PATTERN else None
+MEDIA_BOILERPLATE_SHARE = float(os.getenv('MEDIA_BOILERPLATE_SHARE', '0.3'))
+MEDIA_BOILERPLATE_MIN_PAGES = int(os.getenv('MEDIA_BOILERPLATE_MIN_PAGES', '5'))
+# Learned filters are recounted at most this often per source
+BOILERPLATE_REFRESH_SECONDS = float(os.getenv('MEDIA_BOILERPLATE_REFRESH_SECONDS', '60'))
+
+_boilerplate = {}  # source -> (computed_at, {media_id})
+_boilerplate_lock = threading.Lock()
+
+def boilerplate_ids(session, source, refresh=False):
+    """Media ids seen on too many of source's articles to be part of any one story."""
+    now = time.monotonic()
+    with _boilerplate_lock:
+        cached = _boilerplate.get(source)
+    if cached and not refresh and now - cached[0] < BOILERPLATE_REFRESH_SECONDS:
+        return cached[1]
+    pages = session.query(func.count(func.distinct(ArticleMedia.url))).filter(ArticleMedia.source == source).scalar() or 0
+    threshold = max(MEDIA_BOILERPLATE_MIN_PAGES, MEDIA_BOILERPLATE_SHARE * pages)
+    ids = set(session.scalars(
+        select(ArticleMedia.media_id).where(ArticleMedia.source == source)
+        .group_by(ArticleMedia.media_id).having(func.count(func.distinct(ArticleMedia.url)) >= threshold)
+    ))
+    with _boilerplate_lock:
+        _boilerplate[source] = (now, ids)
+    return ids
+
+def prepare_media(session, source, urls):
+    """Index an article's image URLs; returns (kept urls, [(media_id, kept)]) in page order."""
+    seen = []
+    for url in urls or ():
+        if url and url not in seen and not (IGNORE_MEDIA_RE and IGNORE_MEDIA_RE.search(url)):
+            seen.append(url)
+    if not seen:
+        return [], []
+    ids = dict(session.execute(select(Media.url, Media.id).where(Media.url.in_(seen))).all())
+    missing = [url for url in seen if url not in ids]
+    if missing:
+        rows = [Media(url=url, ref_count=0) for url in missing]
+        session.add_all(rows)
+        session.flush()
+        ids.update((row.url, row.id) for row in rows)
+    boilerplate = boilerplate_ids(session, source) if source else set()
+    refs = [(ids[url], ids[url] not in boilerplate) for url in seen]
+    return [url for url, (_, kept) in zip(seen, refs) if kept], refs
+
+def media_ids(session, url):
+    """The article's media ids in page order, boilerplate included."""
+    return session.scalars(
+        select(ArticleMedia.media_id).where(ArticleMedia.url == url).order_by(ArticleMedia.position)
+    ).all()
+
+def replace_media(session, url, source, refs):
+    """Point the article at refs (from prepare_media), keeping media.ref_count in step."""
+    old = session.scalars(select(ArticleMedia.media_id).where(ArticleMedia.url == url)).all()
+    if old:
+        session.query(Media).filter(Media.id.in_(old)).update(
+            {Media.ref_count: Media.ref_count - 1}, synchronize_session=False)
+        session.query(ArticleMedia).filter_by(url=url).delete(synchronize_session=False)
+    session.add_all(
+        ArticleMedia(url=url, source=source, media_id=media_id, position=position, kept=kept)
+        for position, (media_id, kept) in enumerate(refs)
+    )
+    if refs:
+        session.query(Media).filter(Media.id.in_([media_id for media_id, _ in refs])).update(
+            {Media.ref_count: Media.ref_count + 1}, synchronize_session=False)
+
+def prune_media(session):
+    """Drop references of deleted articles and media nobody references; returns the media rows deleted."""
+    session.query(ArticleMedia).filter(
+        ArticleMedia.url.notin_(select(Article.url))
+    ).delete(synchronize_session=False)
+    # Recounted rather than decremented: partition drops delete articles without touching their references
+    refs = select(func.count(ArticleMedia.id)).where(ArticleMedia.media_id == Media.id).scalar_subquery()
+    session.query(Media).update({Media.ref_count: refs}, synchronize_session=False)
+    deleted = session.query(Media).filter(Media.ref_count == 0).delete(synchronize_session=False)
+    session.commit()
+    return deleted
+
+def hide_boilerplate(session, source):
+    """Mark source's references to its current boilerplate as not kept; returns the article urls affected."""
+    ids = boilerplate_ids(session, source, refresh=True)
+    if not ids:
+        return []
+    stale = (ArticleMedia.source == source, ArticleMedia.kept == True, ArticleMedia.media_id.in_(ids))
+    urls = session.scalars(select(ArticleMedia.url).where(*stale).distinct()).all()
+    if urls:
+        session.query(ArticleMedia).filter(*stale).update({ArticleMedia.kept: False}, synchronize_session=False)
+    return urls
+
+def clear_boilerplate():
+    with _boilerplate_lock:
+        _boilerplate.clear()
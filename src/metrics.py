@@ -0,0 +1,92 @@
+import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# In-process counters and gauges, rendered in the Prometheus text format by
+# GET /metrics (API) or by serve() in the standalone worker. Names ending in
+# _total are counters; everything else is a gauge.
+METRICS_PORT = int(os.getenv('WORKER_METRICS_PORT', '0'))
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}  # name -> {labels: value}
+        self._help = {}
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            key = _labels(labels)
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values.setdefault(name, {})[_labels(labels)] = value
+
+    def get(self, name, **labels):
+        with self._lock:
+            return self._values.get(name, {}).get(_labels(labels), 0)
+
+    def render(self, extra=None):
+        """Return the exposition text; extra is {name: {labels tuple: value}} merged in for this render only."""
+        with self._lock:
+            values = {name: dict(series) for name, series in self._values.items()}
+        for name, series in (extra or {}).items():
+            values.setdefault(name, {}).update(series)
+        lines = []
+        for name in sorted(values):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+            for labels, value in sorted(values[name].items()):
+                label_str = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+                lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+metrics.describe('scrape_jobs_total', 'Scrape jobs run by this process.')
+metrics.describe('scrape_job_deadline_exceeded_total', 'Jobs stopped early by SCRAPE_JOB_DEADLINE_SECONDS.')
+metrics.describe('scrape_job_duration_seconds', 'Duration of the last scrape job.')
+metrics.describe('scrape_sources_skipped_total', 'Sources not visited, by reason (circuit_open, deadline).')
+metrics.describe('scrape_urls_skipped_total', 'Candidate or article URLs not fetched, by reason.')
+metrics.describe('scrape_articles_stored_total', 'Articles written, by source.')
+metrics.describe('scrape_rechecks_total', 'Stored articles re-checked for updates, by result (changed, unchanged).')
+metrics.describe('scrape_breaker_transitions_total', 'Circuit breaker state changes, by source and new state.')
+metrics.describe('scrape_source_consecutive_failures', 'Consecutive failed requests per source.')
+metrics.describe('scrape_source_circuit_state', 'Circuit breaker state per source: 0 closed, 1 half-open, 2 open.')
+
+def serve(port=METRICS_PORT):
+    """Expose /metrics on port from a daemon thread (for processes without the API)."""
+    import http.server
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving metrics on port {server.server_address[1]}.")
+    return server
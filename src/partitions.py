@@ -0,0 +1,143 @@
+import os
+import logging
+import datetime
+from sqlalchemy import event, inspect, text, Column, Index, MetaData, Table
+
+logger = logging.getLogger(__name__)
+
+# Optional day-partitioned layout for SQLite (ARTICLE_PARTITIONING=day).
+#
+# Rows live in one table per scrape day (articles_pYYYYMMDD). `articles`
+# becomes a UNION ALL view over them with INSTEAD OF triggers, so the ORM
+# keeps reading and writing `articles` unchanged: inserts go to the current
+# partition, updates and deletes apply in place in whichever partition holds
+# the row. A row stays in the partition of the day it was first stored, so
+# touches and re-checks do not carry it past its partition's drop.
+# Retention then drops whole partitions instead of running range DELETEs,
+# and ARTICLE_RETENTION_DAYS > 1 keeps a multi-day archive beside the window.
+PARTITIONING = os.getenv('ARTICLE_PARTITIONING', '') == 'day' and os.getenv('DATABASE_URL', 'sqlite').startswith('sqlite')
+RETENTION_DAYS = int(os.getenv('ARTICLE_RETENTION_DAYS', '1'))
+PREFIX = 'articles_p'
+
+def partition_name(day):
+    return f"{PREFIX}{day:%Y%m%d}"
+
+def list_partitions(conn):
+    rows = conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :prefix ORDER BY name"
+    ), {'prefix': PREFIX + '%'})
+    return [name for (name,) in rows]
+
+def configure(engine):
+    """Report real rowcounts for UPDATE and DELETE through the view.
+
+    SQLite's changes() (the DB-API rowcount) leaves out writes made by
+    triggers, so every statement on the view would report 0 rows. total_changes
+    counts them; its growth over the statement is the number of partition rows
+    written, which the ORM's stale-row check and query.update() then see.
+    """
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _count_before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and (context.isupdate or context.isdelete):
+            context._total_changes_before = conn.connection.dbapi_connection.total_changes
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _count_after(conn, cursor, statement, parameters, context, executemany):
+        before = getattr(context, '_total_changes_before', None)
+        if before is not None:
+            # Read by SQLAlchemy in place of cursor.rowcount
+            context._rowcount = conn.connection.dbapi_connection.total_changes - before
+
+def _create_partition(conn, table, name):
+    part = Table(name, MetaData(), *[Column(c.name, c.type, primary_key=c.primary_key) for c in table.columns])
+    Index(f"ix_{name}_scraped_at", part.c.scraped_at)
+    part.create(conn, checkfirst=True)
+
+def _add_missing_columns(conn, table, name):
+    # Returns True if the partition gained a column (the view must then be rebuilt)
+    existing = {c['name'] for c in inspect(conn).get_columns(name)}
+    added = False
+    for column in table.columns:
+        if column.name not in existing:
+            col_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE {name} ADD COLUMN {column.name} {col_type}'))
+            added = True
+    return added
+
+def _rebuild_view(conn, table, partitions, current):
+    cols = [c.name for c in table.columns]
+    col_list = ', '.join(cols)
+    new_values = ', '.join(f'NEW.{c}' for c in cols)
+    assignments = ', '.join(f'{c} = NEW.{c}' for c in cols)
+    # A url lives in one partition; the other statements match nothing
+    update_old = ' '.join(f'UPDATE {p} SET {assignments} WHERE url = OLD.url;' for p in partitions)
+    delete_old = ' '.join(f'DELETE FROM {p} WHERE url = OLD.url;' for p in partitions)
+    conn.execute(text(f'DROP VIEW IF EXISTS {table.name}'))
+    conn.execute(text(f'CREATE VIEW {table.name} AS ' + ' UNION ALL '.join(f'SELECT {col_list} FROM {p}' for p in partitions)))
+    conn.execute(text(
+        f'CREATE TRIGGER {table.name}_insert INSTEAD OF INSERT ON {table.name} BEGIN '
+        f'INSERT INTO {current} ({col_list}) VALUES ({new_values}); END'
+    ))
+    conn.execute(text(
+        f'CREATE TRIGGER {table.name}_update INSTEAD OF UPDATE ON {table.name} BEGIN '
+        f'{update_old} END'
+    ))
+    conn.execute(text(
+        f'CREATE TRIGGER {table.name}_delete INSTEAD OF DELETE ON {table.name} BEGIN {delete_old} END'
+    ))
+
+def ensure_partitions(engine, table, today=None):
+    """Make sure today's partition exists and the view/triggers point at it.
+
+    A plain `articles` table (fresh DB, or one created before partitioning was
+    enabled) is renamed into today's partition. Cheap to call on every job.
+    """
+    today = today or datetime.datetime.utcnow().date()
+    current = partition_name(today)
+    with engine.begin() as conn:
+        insp = inspect(conn)
+        if table.name in insp.get_table_names():
+            conn.execute(text(f'ALTER TABLE {table.name} RENAME TO {current}'))
+            conn.execute(text(f'DROP INDEX IF EXISTS ix_{table.name}_url'))
+        partitions = list_partitions(conn)
+        migrated = [name for name in partitions if _add_missing_columns(conn, table, name)]
+        if current not in partitions:
+            _create_partition(conn, table, current)
+            partitions.append(current)
+        triggers = dict(conn.execute(text(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN (:insert, :update)"
+        ), {'insert': f'{table.name}_insert', 'update': f'{table.name}_update'}).all())
+        rebuild = (
+            migrated
+            or current not in triggers.get(f'{table.name}_insert', '')
+            # Update triggers from before in-place updates moved the row to the current partition
+            or 'INSERT INTO' in triggers.get(f'{table.name}_update', '')
+        )
+        if rebuild or table.name not in insp.get_view_names():
+            _rebuild_view(conn, table, partitions, current)
+            logger.info(f"Articles partitions: {len(partitions)}, writing to {current}.")
+
+def drop_expired_partitions(engine, table, now=None, before_drop=None):
+    """Drop partitions whose whole day is older than the retention period; returns their names.
+
+    before_drop(conn, names) runs in the same transaction, while the rows still exist.
+    """
+    now = now or datetime.datetime.utcnow()
+    oldest_kept = partition_name((now - datetime.timedelta(days=RETENTION_DAYS)).date())
+    with engine.begin() as conn:
+        partitions = list_partitions(conn)
+        expired = [p for p in partitions if p < oldest_kept]
+        kept = [p for p in partitions if p >= oldest_kept]
+        if not expired or not kept:
+            return []
+        if before_drop:
+            before_drop(conn, expired)
+        for name in expired:
+            conn.execute(text(f'DROP TABLE {name}'))
+        current = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = :n"
+        ), {'n': f'{table.name}_insert'}).scalar() or ''
+        current = next((p for p in reversed(kept) if p in current), kept[-1])
+        _rebuild_view(conn, table, kept, current)
+    logger.info(f"Dropped {len(expired)} expired article partitions: {', '.join(expired)}.")
+    return expired
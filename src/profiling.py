@@ -0,0 +1,253 @@
+import os
+import re
+import json
+import time
+import pstats
+import shutil
+import cProfile
+import datetime
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# Opt-in profiling of scrape jobs: SCRAPE_PROFILE=1 for every job, or
+# /scrape-now?profile=1 for one. A profiled job writes to SCRAPE_PROFILE_DIR/<run id>/:
+#   <source>.<stage>.prof       cProfile stats (pstats, snakeviz, gprof2dot)
+#   <source>.<stage>.collapsed  folded stacks for flamegraph.pl or speedscope,
+#                               approximated from the pstats call graph
+#   <source>.<phase>.tracemalloc  tracemalloc snapshots (tracemalloc.Snapshot.load)
+#   summary.json                per-stage times, top functions and memory growth
+# Stages: discover, screen_fetch, screen_parse, article_fetch, article_parse
+# and write. Fetch stages are profiled on the I/O threads and parse stages in
+# the parse workers, whose stats are sent back with each result. tracemalloc
+# covers the job's own process only. GET /admin/profiles serves the results.
+PROFILE = os.getenv('SCRAPE_PROFILE', '0') == '1'
+PROFILE_DIR = os.getenv('SCRAPE_PROFILE_DIR', 'profiles')
+# Profiled runs kept on disk; older ones are deleted
+PROFILE_KEEP = int(os.getenv('SCRAPE_PROFILE_KEEP', '10'))
+TRACEMALLOC_FRAMES = int(os.getenv('SCRAPE_PROFILE_TRACEMALLOC_FRAMES', '10'))
+TOP_N = 15
+# Folded stacks deeper than this are cut off
+MAX_STACK_DEPTH = 48
+
+RUN_ID_RE = re.compile(r'^\d{8}T\d{6}(-\d+)?$')
+
+_active = None
+last_run_id = None
+
+class _LoadedStats:
+    # Lets pstats.Stats load a stats dict sent back by a parse worker
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+def _label(func):
+    filename, line, name = func
+    if filename == '~':
+        return name  # built-ins
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+def collapsed_stacks(stats):
+    """Return folded stack lines ("a;b;c <microseconds>") approximated from a pstats.Stats call graph.
+
+    cProfile records caller->callee edges, not whole stacks, so each edge's
+    time is split across the paths into its caller in proportion.
+    """
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    folded = {}
+
+    def walk(func, path, on_stack, budget):
+        _, _, tt, ct, _ = entries[func]
+        share = budget / ct if ct else 0.0
+        path = path + (_label(func),)
+        if tt * share > 0:
+            key = ';'.join(path)
+            folded[key] = folded.get(key, 0.0) + tt * share
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, ()):
+            # Recursion folds into the outermost frame; slivers under 1us are dropped
+            if callee in on_stack or callee not in entries or edge_ct * share < 1e-6:
+                continue
+            walk(callee, path, on_stack | {callee}, edge_ct * share)
+
+    for func, (_, _, _, ct, callers) in entries.items():
+        if not callers:
+            walk(func, (), {func}, ct)
+    return [f"{stack} {round(seconds * 1e6)}" for stack, seconds in sorted(folded.items()) if seconds >= 5e-7]
+
+def profiled_task(task, *args):
+    """Run task(*args) under cProfile in a parse worker; returns (result, stats dict)."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = task(*args)
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    return result, profiler.stats
+
+class JobProfile:
+    def __init__(self, directory=PROFILE_DIR):
+        stamp = datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        self.run_id = stamp
+        n = 1
+        while os.path.exists(os.path.join(directory, self.run_id)):
+            n += 1
+            self.run_id = f'{stamp}-{n}'
+        self.directory = directory
+        self.path = os.path.join(directory, self.run_id)
+        os.makedirs(self.path)
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stats = {}  # (source, stage) -> pstats.Stats
+        self._memory = []
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        # Baseline, so the first source's growth is measured from the job's start
+        self._last_snapshot = self._take_snapshot()
+
+    def add(self, source, stage, profile):
+        """Merge a cProfile.Profile, or a stats dict from profiled_task, into (source, stage)."""
+        if not hasattr(profile, 'create_stats'):
+            profile = _LoadedStats(profile)
+        with self._lock:
+            key = (source, stage)
+            if key in self._stats:
+                self._stats[key].add(profile)
+            else:
+                self._stats[key] = pstats.Stats(profile)
+
+    @contextmanager
+    def stage(self, source, stage):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per interpreter; this sample is skipped
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self.add(source, stage, profiler)
+
+    def call(self, source, stage, fn, *args):
+        with self.stage(source, stage):
+            return fn(*args)
+
+    @staticmethod
+    def _take_snapshot():
+        # Leave out the profiler's own bookkeeping and import machinery
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, path)
+            for path in (tracemalloc.__file__, cProfile.__file__, pstats.__file__, __file__,
+                         '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>')
+        ])
+
+    def snapshot(self, source, phase):
+        """Dump a tracemalloc snapshot and record memory growth since the previous one."""
+        snapshot = self._take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        top = snapshot.compare_to(self._last_snapshot, 'lineno')[:TOP_N]
+        snapshot.dump(os.path.join(self.path, f'{source}.{phase}.tracemalloc'))
+        self._last_snapshot = snapshot
+        self._memory.append({
+            'source': source,
+            'phase': phase,
+            'current_bytes': current,
+            'peak_bytes': peak,
+            'top': [str(stat) for stat in top],
+        })
+
+    def finish(self):
+        """Write the stats files and summary.json; returns the summary."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        stages = []
+        for (source, stage), stats in sorted(self._stats.items()):
+            base = os.path.join(self.path, f'{source}.{stage}')
+            stats.dump_stats(base + '.prof')
+            with open(base + '.collapsed', 'w') as f:
+                f.write('\n'.join(collapsed_stacks(stats)) + '\n')
+            top = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:TOP_N]
+            stages.append({
+                'source': source,
+                'stage': stage,
+                'seconds': round(stats.total_tt, 4),
+                'calls': stats.total_calls,
+                'top': [
+                    {'function': _label(func), 'ncalls': nc, 'tottime': round(tt, 4), 'cumtime': round(ct, 4)}
+                    for func, (_, nc, tt, ct, _) in top
+                ],
+            })
+        summary = {
+            'run_id': self.run_id,
+            'started_at': datetime.datetime.utcfromtimestamp(self.started).isoformat(),
+            'duration_seconds': round(time.time() - self.started, 2),
+            'stages': stages,
+            'memory': self._memory,
+            'files': sorted(os.listdir(self.path)) + ['summary.json'],
+        }
+        with open(os.path.join(self.path, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=1)
+        return summary
+
+def active():
+    return _active
+
+@contextmanager
+def stage(source, name):
+    # No-op unless a profiled job is running
+    if _active is None:
+        yield
+    else:
+        with _active.stage(source, name):
+            yield
+
+def snapshot(source, phase):
+    if _active is not None:
+        _active.snapshot(source, phase)
+
+@contextmanager
+def profile_job(enabled=PROFILE, directory=PROFILE_DIR):
+    """Profile the job run inside the block when enabled; yields the JobProfile or None."""
+    global _active, last_run_id
+    if not enabled:
+        yield None
+        return
+    _active = JobProfile(directory)
+    try:
+        yield _active
+    finally:
+        job, _active = _active, None
+        job.finish()
+        last_run_id = job.run_id
+        _prune_runs(directory)
+
+def _prune_runs(directory, keep=PROFILE_KEEP):
+    runs = list_runs(directory)
+    for run_id in runs[keep:]:
+        shutil.rmtree(os.path.join(directory, run_id), ignore_errors=True)
+
+def list_runs(directory=PROFILE_DIR):
+    """Run ids with results on disk, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted((name for name in os.listdir(directory) if RUN_ID_RE.match(name)), reverse=True)
+
+def run_file(run_id, filename, directory=PROFILE_DIR):
+    """Path of one result file, or None for unknown or unsafe names."""
+    if not RUN_ID_RE.match(run_id) or filename != os.path.basename(filename) or filename.startswith('.'):
+        return None
+    path = os.path.join(directory, run_id, filename)
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,63 @@
+import os
+import heapq
+import datetime
+from collections import namedtuple
+from sqlalchemy import func
+from src.db import Article
+
+# Tiered freshness. After its regular pass the job re-checks up to
+# REFRESH_BUDGET stored articles with conditional requests (ETag,
+# Last-Modified, content hash), so developing stories (death tolls, evacuation
+# orders) are updated within the hour instead of never. Each article's
+# re-check interval comes from its age tier and is scaled by how often past
+# re-checks found new content; the most overdue articles go first.
+REFRESH_BUDGET = int(os.getenv('SCRAPE_REFRESH_BUDGET', '40'))
+
+def _parse_tiers(value):
+    # "2:15,6:30" -> [(2.0, 15.0), (6.0, 30.0)]: articles younger than 2h every 15 min, then every 30 min up to 6h
+    tiers = []
+    for part in value.split(','):
+        hours, _, minutes = part.partition(':')
+        tiers.append((float(hours), float(minutes)))
+    return sorted(tiers)
+
+REFRESH_TIERS = _parse_tiers(os.getenv('SCRAPE_REFRESH_TIERS', '2:15,6:30,12:60,24:180'))
+REFRESH_MIN_MINUTES = float(os.getenv('SCRAPE_REFRESH_MIN_MINUTES', '10'))
+# Articles that never change are still looked at, at most this many times less often than their tier says
+MAX_BACKOFF = 4.0
+
+DueArticle = namedtuple('DueArticle', 'priority url source validators')
+
+def recheck_interval(age_hours, checks=0, changes=0):
+    """Minutes between re-checks of an article, or None once it is past the last tier."""
+    for max_age, minutes in REFRESH_TIERS:
+        if age_hours < max_age:
+            break
+    else:
+        return None
+    # Share of re-checks that found new content, smoothed so one observation doesn't swing it; 0.5 with none
+    rate = (changes + 1) / (checks + 2)
+    return max(REFRESH_MIN_MINUTES, minutes * min(0.5 / rate, MAX_BACKOFF))
+
+def due_articles(session, now=None, budget=REFRESH_BUDGET):
+    """Return up to budget DueArticles whose re-check interval has passed, most overdue first."""
+    now = now or datetime.datetime.utcnow()
+    if budget <= 0 or not REFRESH_TIERS:
+        return []
+    oldest = now - datetime.timedelta(hours=REFRESH_TIERS[-1][0])
+    published = func.coalesce(Article.publication_date, Article.scraped_at)
+    rows = session.query(
+        Article.url, Article.source, Article.publication_date, Article.scraped_at, Article.checked_at,
+        Article.check_count, Article.change_count, Article.etag, Article.last_modified, Article.content_hash,
+    ).filter(published >= oldest)
+    due = []
+    for row in rows:
+        age_hours = (now - (row.publication_date or row.scraped_at)).total_seconds() / 3600
+        interval = recheck_interval(age_hours, row.check_count or 0, row.change_count or 0)
+        if interval is None:
+            continue
+        last = max(row.checked_at or row.scraped_at, row.scraped_at)
+        overdue = (now - last).total_seconds() / 60 / interval
+        if overdue >= 1:
+            due.append(DueArticle(overdue, row.url, row.source, (row.etag, row.last_modified, row.content_hash)))
+    return heapq.nlargest(budget, due)
@@ -0,0 +1,145 @@
+import os
+import logging
+import datetime
+import threading
+from contextlib import contextmanager
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Per-source circuit breakers. After BREAKER_FAILURES consecutive failed
+# requests (connection errors, timeouts, 5xx, 429) a source's breaker opens and
+# its requests fail fast. Once the cooldown has passed, up to BREAKER_PROBES
+# half-open requests go through: a success closes the breaker, a failure
+# reopens it with the cooldown doubled (up to BREAKER_MAX_COOLDOWN_SECONDS).
+# The job persists breaker state in source_breakers, so it carries across jobs
+# and across whichever process holds the scrape lease.
+BREAKER_FAILURES = int(os.getenv('SCRAPE_BREAKER_FAILURES', '5'))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv('SCRAPE_BREAKER_COOLDOWN_SECONDS', '900'))
+BREAKER_MAX_COOLDOWN_SECONDS = float(os.getenv('SCRAPE_BREAKER_MAX_COOLDOWN_SECONDS', '21600'))
+BREAKER_PROBES = int(os.getenv('SCRAPE_BREAKER_PROBES', '1'))
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitOpenError(Exception):
+    pass
+
+def is_source_failure(exc):
+    # A missing article (404), an oversized page or a parse error says nothing about the source's health
+    from .http_client import HttpError, ResponseTooLarge, httpx
+    if isinstance(exc, (CircuitOpenError, ResponseTooLarge)):
+        return False
+    status = getattr(exc, 'status_code', None)
+    if status is not None:
+        return status >= 500 or status == 429
+    # Connection errors and timeouts (requests' exceptions are OSErrors)
+    return isinstance(exc, (HttpError, OSError)) or (httpx is not None and isinstance(exc, httpx.TransportError))
+
+class CircuitBreaker:
+    def __init__(self, name, threshold=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN_SECONDS, probes=BREAKER_PROBES):
+        self.name = name
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.probes = probes
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probing = 0
+        self._lock = threading.Lock()
+
+    def _transition(self, state):
+        self.state = state
+        metrics.inc('scrape_breaker_transitions_total', source=self.name, state=state)
+        metrics.set('scrape_source_circuit_state', STATE_VALUES[state], source=self.name)
+        if state == OPEN:
+            logger.warning(f"{self.name}: Circuit open after {self.failures} consecutive failures; retrying in {self.cooldown:.0f}s.")
+        else:
+            logger.info(f"{self.name}: Circuit {state.replace('_', '-')}.")
+
+    def rejecting(self, now=None):
+        """True while open and still cooling down; does not use up a half-open probe."""
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            return self.state == OPEN and (now - self.opened_at).total_seconds() < self.cooldown
+
+    def allow(self, now=None):
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if (now - self.opened_at).total_seconds() < self.cooldown:
+                    return False
+                self._probing = 0
+                self._transition(HALF_OPEN)
+            if self._probing >= self.probes:
+                return False
+            self._probing += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != CLOSED:
+                self.cooldown = self.base_cooldown
+                self.opened_at = None
+                self._transition(CLOSED)
+
+    def record_failure(self, now=None):
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, BREAKER_MAX_COOLDOWN_SECONDS)
+            elif self.state == OPEN or self.failures < self.threshold:
+                return
+            self.opened_at = now
+            self._transition(OPEN)
+
+    def _release_probe(self):
+        with self._lock:
+            if self.state == HALF_OPEN and self._probing:
+                self._probing -= 1
+
+    @contextmanager
+    def guard(self):
+        """Wrap one request: raises CircuitOpenError instead of sending it while open."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name}: circuit open")
+        try:
+            yield
+        except Exception as e:
+            if is_source_failure(e):
+                self.record_failure()
+            else:
+                # Neither a failure nor a success: the streak stands, and a probe is freed for the next request
+                self._release_probe()
+            raise
+        self.record_success()
+
+    def snapshot(self):
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures, 'opened_at': self.opened_at, 'cooldown': self.cooldown}
+
+    def restore(self, state, failures, opened_at, cooldown):
+        with self._lock:
+            # A probe in flight when the state was saved is gone; resume from open
+            self.state = OPEN if state == HALF_OPEN else state
+            self.failures = failures or 0
+            self.opened_at = opened_at
+            self.cooldown = cooldown or self.base_cooldown
+            self._probing = 0
+            metrics.set('scrape_source_circuit_state', STATE_VALUES[self.state], source=self.name)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name):
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
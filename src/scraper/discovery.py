@@ -0,0 +1,100 @@
+import os
+import re
+import html
+import threading
+from datetime import datetime, timedelta
+
+# Homepage link discovery. The page is scanned for <a href> attributes chunk by
+# chunk as it downloads, with no parse tree, and each href goes through the
+# source's compiled link filter (extraction.compile_link_rules).
+#
+# Sources keep the screening result of every link on their last homepage, so
+# a run only fetches the heads of links that have newly appeared; links still
+# on the page reuse last run's verdict. Set SCRAPE_HOMEPAGE_DIFF=0 to screen
+# every link on every run.
+HOMEPAGE_DIFF = os.getenv('SCRAPE_HOMEPAGE_DIFF', '1') == '1'
+
+# An <a> tag up to its href attribute. The attributes before it are matched
+# whole, so a quoted value may hold '>' and data-href is not taken for href.
+# Unquoted values must be followed by whitespace or '>', so one cut off at
+# the end of a chunk is not matched.
+_ATTR = rb'''\s+[^\s"'>=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'>]+))?'''
+_HREF_RE = re.compile(
+    rb'''<a(?=\s)(?:''' + _ATTR + rb''')*?\s+href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)(?=[\s>]))''',
+    re.IGNORECASE,
+)
+# A whole <a ...> tag, quoted values included
+_A_TAG_RE = re.compile(rb'''<a\s(?:[^>"']|"[^"]*"|'[^']*')*>''', re.IGNORECASE)
+# Longest unterminated tag carried into the next chunk; bounds memory on malformed pages
+MAX_TAG_BYTES = 16 * 1024
+
+def _href(match):
+    value = (match.group(1) or match.group(2) or match.group(3) or b'').decode('utf-8', 'replace').strip()
+    return html.unescape(value) if '&' in value else value
+
+def _cut(buf, pos):
+    """Where buf's unfinished <a> tag (or a '<' / '<a' cut off at the end) starts, at or after pos."""
+    i = buf.rfind(b'<', pos)
+    if i == len(buf) - 1:
+        return i
+    while i >= pos:
+        if buf[i + 1:i + 2] in (b'a', b'A') and (i + 2 == len(buf) or buf[i + 2:i + 3].isspace()):
+            # The last <a> start decides: if it is closed, so is every tag before it
+            return len(buf) if _A_TAG_RE.match(buf, i) else i
+        i = buf.rfind(b'<', pos, i)
+    return len(buf)
+
+def iter_hrefs(chunks):
+    """Yield the href of every <a> tag in an HTML byte stream, in document order."""
+    tail = b''
+    for chunk in chunks:
+        buf = tail + chunk
+        end = 0
+        for match in _HREF_RE.finditer(buf):
+            end = match.end()
+            yield _href(match)
+        # A tag still open at the end of the chunk is matched once the next one completes it
+        tail = buf[_cut(buf, end):][-MAX_TAG_BYTES:]
+    # Close a tag left open at the end of the page
+    for match in _HREF_RE.finditer(tail + b'>'):
+        yield _href(match)
+
+class ScreenedLinks:
+    """Screening verdicts for the links on a source's last homepage: {url: publication datetime, or None if rejected}."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._verdicts = {}
+
+    def split(self, links, now=None):
+        """Return (new_links, known) where known maps still-listed links to their verdict."""
+        now = now or datetime.utcnow()
+        with self._lock:
+            verdicts = dict(self._verdicts)
+        new = []
+        known = {}
+        for link in links:
+            if link not in verdicts:
+                new.append(link)
+            else:
+                pub_dt = verdicts[link]
+                # Accepted last time but past the window by now
+                known[link] = pub_dt if pub_dt and now - pub_dt <= timedelta(hours=24) else None
+        return new, known
+
+    def update(self, links, screened):
+        """Keep the verdicts for links (the current homepage); screened holds this run's results.
+
+        Links that were not screened (fetch errors, or a run stopped early) get
+        no verdict, so the next run tries them again.
+        """
+        with self._lock:
+            previous = self._verdicts
+            self._verdicts = {
+                link: screened[link] if link in screened else previous[link]
+                for link in links if link in screened or link in previous
+            }
+
+    def clear(self):
+        with self._lock:
+            self._verdicts = {}
@@ -0,0 +1,266 @@
+import re
+from html.parser import HTMLParser
+from src.utils.clean import clean_text, parse_date
+
+# Declarative extraction: a source's field specs (see sources.json) compile into
+# an ExtractionPlan that collects every field in one streaming HTMLParser pass,
+# instead of building a BeautifulSoup tree and calling find()/find_all() per field.
+#
+# A field spec is one selector or a list of them tried in order (first non-empty wins):
+#   {"tag": "meta", "attrs": {"property": "og:title"}, "attr": "content"}
+#   {"tag": "li", "attrs": {"class": "tag"}, "all": true}     -> list of texts
+#   {"tag": "a", "attrs": {...}, "all": true, "link_base": "https://x.com"}
+#                                                              -> [{"title", "url"}]
+#   {"relative": ["span", "time"]}  -> first element text dateparser understands
+# attrs values of true only require the attribute; "class" matches one class
+# or the whole class string, as in BeautifulSoup.
+
+FIELDS = ('headline', 'subtitle', 'publication_date', 'author', 'content', 'tags', 'media_urls', 'related_articles')
+LIST_FIELDS = {'tags', 'media_urls', 'related_articles'}
+SCREEN_FIELDS = ('publication_date', 'headline', 'subtitle')
+
+DEFAULT_FIELDS = {
+    'headline': {'tag': 'h1'},
+    'subtitle': {'tag': 'h2'},
+    'publication_date': [
+        {'tag': 'meta', 'attrs': {'property': 'article:published_time'}, 'attr': 'content'},
+        {'relative': ['span', 'time']},
+    ],
+    'author': None,
+    'content': {'tag': 'article'},
+    'tags': None,
+    'media_urls': {'tag': 'img', 'attr': 'src', 'all': True},
+    'related_articles': None,
+}
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+# Their text is not part of .text in BeautifulSoup either
+SKIP_TEXT_TAGS = {'script', 'style', 'template'}
+
+class Selector:
+    __slots__ = ('field', 'slot', 'tags', 'attrs', 'attr', 'many', 'link_base', 'relative')
+
+    def __init__(self, field, slot, spec):
+        self.field = field
+        self.slot = slot
+        self.relative = 'relative' in spec
+        self.tags = list(spec['relative']) if self.relative else [spec['tag']]
+        self.attrs = spec.get('attrs') or {}
+        self.attr = spec.get('attr')
+        self.many = bool(spec.get('all')) or self.relative
+        self.link_base = spec.get('link_base')
+
+    def matches(self, attrs):
+        for name, value in self.attrs.items():
+            if name not in attrs:
+                return False
+            if value is True:
+                continue
+            actual = attrs[name] or ''
+            if actual != value and not (name == 'class' and value in actual.split()):
+                return False
+        return True
+
+def compile_link_rules(rules):
+    """Compile link rules into one anchored regex; returns a link_filter callable.
+
+    Rules are alternatives; the conditions inside one rule (contains, startswith,
+    endswith, regex -- the last matched from the start of the link) must all hold.
+    """
+    alternatives = []
+    for rule in rules:
+        parts = []
+        for cond, value in rule.items():
+            if cond == 'contains':
+                parts.append(f'(?=.*?{re.escape(value)})')
+            elif cond == 'startswith':
+                parts.append(f'(?={re.escape(value)})')
+            elif cond == 'endswith':
+                parts.append(f'(?=.*{re.escape(value)}\\Z)')
+            elif cond == 'regex':
+                parts.append(f'(?={value})')
+            else:
+                raise ValueError(f"Unknown link rule condition: {cond}")
+        alternatives.append(''.join(parts))
+    pattern = re.compile('|'.join(f'(?:{alt})' for alt in alternatives), re.DOTALL)
+    return lambda link: pattern.match(link) is not None
+
+def _specs(spec):
+    if spec is None:
+        return []
+    return spec if isinstance(spec, list) else [spec]
+
+def _absolute(href, base):
+    if href and not href.startswith('http'):
+        return base + href
+    return href
+
+class ExtractionPlan:
+    """Compiled field specs for one source; extract(html) returns the article fields."""
+
+    def __init__(self, fields=None):
+        fields = dict(DEFAULT_FIELDS, **(fields or {}))
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown extraction fields: {', '.join(sorted(unknown))}")
+        self.selectors = []
+        self.chains = {}
+        for field in FIELDS:
+            chain = []
+            for spec in _specs(fields[field]):
+                sel = Selector(field, len(self.selectors), spec)
+                self.selectors.append(sel)
+                chain.append(sel)
+            self.chains[field] = chain
+        self._indexes = {}
+
+    def _index(self, fields):
+        # tag -> selectors, built once per field subset (full parse vs screening)
+        if fields not in self._indexes:
+            index = {}
+            for field in fields:
+                for sel in self.chains[field]:
+                    for tag in sel.tags:
+                        index.setdefault(tag, []).append(sel)
+            self._indexes[fields] = index
+        return self._indexes[fields]
+
+    def screen_fields(self):
+        """(tag, attrs) specs for screening.read_head: the first pubdate, headline and subtitle selectors."""
+        specs = []
+        for field in SCREEN_FIELDS:
+            sel = next((s for s in self.chains[field] if not s.relative), None)
+            if sel is not None:
+                attrs = dict(sel.attrs, **({sel.attr: True} if sel.attr else {}))
+                specs.append((sel.tags[0], attrs or None))
+        return tuple(specs)
+
+    def extract(self, html, fields=FIELDS):
+        if isinstance(html, bytes):
+            html = html.decode('utf-8', errors='replace')
+        collector = _Collector(self._index(tuple(fields)))
+        collector.feed(html)
+        collector.close()
+        return {field: self._value(field, collector.found) for field in fields}
+
+    def _value(self, field, found):
+        for sel in self.chains[field]:
+            values = found.get(sel.slot)
+            if not values:
+                continue
+            if sel.relative:
+                # Slow to import (locale data); only needed when no machine-readable date was found
+                import dateparser
+                for text in values:
+                    dt = dateparser.parse(text.lower())
+                    if dt:
+                        return dt.isoformat()
+                continue
+            if field == 'publication_date':
+                value = parse_date(values[0])
+            elif sel.link_base is not None:
+                value = [{'title': title, 'url': _absolute(href, sel.link_base)} for title, href in values]
+            elif sel.many:
+                value = values
+            else:
+                value = clean_text(values[0])
+            if value:
+                return value
+        return [] if field in LIST_FIELDS else None
+
+class _Capture:
+    __slots__ = ('sel', 'parts', 'href', 'values', 'pos')
+
+    def __init__(self, sel, values, href=None):
+        # Position reserved at the start tag keeps results in document order, like find_all
+        self.sel = sel
+        self.parts = []
+        self.href = href
+        self.values = values
+        self.pos = len(values)
+        values.append(None)
+
+class _Collector(HTMLParser):
+    """Single pass over the document, filling found[slot] for every matching selector.
+
+    Keeps a stack of open elements so an end tag also closes elements left
+    unclosed inside it, the way BeautifulSoup's html.parser builder does.
+    """
+
+    def __init__(self, index):
+        super().__init__(convert_charrefs=True)
+        self.index = index
+        self.found = {}
+        self.stack = []     # [tag, captures opened on that element]
+        self.active = []    # captures currently receiving text
+        self.skip_text = 0
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, tag in VOID_TAGS)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, True)
+
+    def _start(self, tag, attrs, void):
+        captures = []
+        sels = self.index.get(tag)
+        if sels:
+            attrs = dict(attrs)
+            for sel in sels:
+                if not sel.many and sel.slot in self.found:
+                    continue  # first match already taken
+                if not sel.matches(attrs):
+                    continue
+                if sel.attr:
+                    value = attrs.get(sel.attr)
+                    if value:
+                        self.found.setdefault(sel.slot, []).append(value)
+                    continue
+                # Once reserved, a single-value selector ignores later matches
+                captures.append(_Capture(sel, self.found.setdefault(sel.slot, []), attrs.get('href')))
+        if void:
+            for cap in captures:
+                self._finish(cap)
+            return
+        self.stack.append((tag, captures))
+        self.active.extend(captures)
+        if tag in SKIP_TEXT_TAGS:
+            self.skip_text += 1
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                while len(self.stack) > i:
+                    self._pop()
+                return
+        # Stray end tag: ignored, as BeautifulSoup does
+
+    def _pop(self):
+        tag, captures = self.stack.pop()
+        if tag in SKIP_TEXT_TAGS:
+            self.skip_text -= 1
+        for cap in captures:
+            self.active.remove(cap)
+            self._finish(cap)
+
+    def handle_data(self, data):
+        if self.skip_text or not self.active:
+            return
+        for cap in self.active:
+            cap.parts.append(data)
+
+    def _finish(self, cap):
+        sel = cap.sel
+        if sel.relative:
+            # get_text(strip=True): each string stripped, then joined
+            value = ''.join(part.strip() for part in cap.parts)
+        else:
+            value = ''.join(cap.parts)
+        if sel.link_base is not None:
+            value = (value, cap.href)
+        cap.values[cap.pos] = value
+
+    def close(self):
+        super().close()
+        while self.stack:
+            self._pop()
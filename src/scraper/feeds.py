@@ -0,0 +1,64 @@
+import xml.etree.ElementTree as ET
+from dateutil import parser as date_parser
+from src.utils.clean import clean_text, to_naive_utc
+
+# Child element names (namespace stripped) holding each field, in order of preference.
+# Covers RSS 2.0 <item>, Atom <entry> and Google News sitemap <url> entries.
+ENTRY_TAGS = {'item', 'entry', 'url'}
+TITLE_TAGS = ('title',)
+SUMMARY_TAGS = ('description', 'summary', 'keywords')
+DATE_TAGS = ('publication_date', 'pubDate', 'published', 'date', 'updated', 'lastmod')
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+def _parse_dt(text):
+    if not text:
+        return None
+    try:
+        return to_naive_utc(date_parser.parse(text.strip()))
+    except (ValueError, OverflowError):
+        return None
+
+def _entry_fields(elem):
+    fields = {}
+    for node in elem.iter():
+        if node is elem:
+            continue
+        name = _local(node.tag)
+        if name in ('link', 'loc') and 'url' not in fields:
+            # Atom puts the URL in href; RSS and sitemaps in the element text
+            href = node.get('href') if node.get('rel', 'alternate') == 'alternate' else None
+            url = href or (node.text or '').strip()
+            if url:
+                fields['url'] = url
+        elif node.text and name not in fields:
+            fields[name] = node.text
+    return fields
+
+def _first(fields, names):
+    for name in names:
+        if fields.get(name):
+            return fields[name]
+    return None
+
+def parse_feed(content):
+    """Parse an RSS, Atom or news sitemap document into entry dicts.
+
+    Each entry has url, title, summary and published (naive UTC datetime or None).
+    """
+    root = ET.fromstring(content)
+    entries = []
+    for elem in root.iter():
+        if _local(elem.tag) not in ENTRY_TAGS:
+            continue
+        fields = _entry_fields(elem)
+        if not fields.get('url'):
+            continue
+        entries.append({
+            'url': fields['url'],
+            'title': clean_text(_first(fields, TITLE_TAGS)),
+            'summary': clean_text(_first(fields, SUMMARY_TAGS)),
+            'published': _parse_dt(_first(fields, DATE_TAGS)),
+        })
+    return entries
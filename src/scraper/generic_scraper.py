@@ -1,14 +1,28 @@
-import time
+import hashlib
 import logging
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-from src.utils.clean import clean_text, parse_date
+from src.utils.clean import clean_text, parse_date, to_naive_utc
 from dateutil import parser as date_parser
+from .http_client import get_client, HttpError, DEFAULT_TIMEOUT
+from .feeds import parse_feed
+from .screening import read_head, DEFAULT_SCREEN_FIELDS, SCREEN_BYTE_BUDGET, SCREEN_CHUNK_SIZE
+from .extraction import FIELDS, LIST_FIELDS, SCREEN_FIELDS
+from .relevance import get_counter
+from .locations import find_locations
+from .circuit import get_breaker
+from .discovery import iter_hrefs, ScreenedLinks
+import os
 import re
 
 logger = logging.getLogger(__name__)
 
+# Candidate screening sees only the feed entry or page head, so it keeps a cheap
+# keyword check on title/subtitle; relevance scoring of the full article happens
+# at write time. Set SCRAPE_SCREEN_KEYWORDS=0 to fetch every recent article and
+# let the score decide, which also catches stories whose terms are only in the body.
+SCREEN_KEYWORDS = os.getenv('SCRAPE_SCREEN_KEYWORDS', '1') == '1'
+
 def contains_keywords(text, keywords):
     if not text or not keywords:
         return []
@@ -21,8 +35,10 @@ def contains_keywords(text, keywords):
     return matched
 
 class GenericScraper:
-    def __init__(self, name, homepage_url, link_filter, pubdate_extractor, headline_extractor, author_extractor, content_extractor, tags_extractor, media_extractor, related_extractor, subtitle_extractor=None, keywords=None):
+    def __init__(self, name, homepage_url, link_filter, pubdate_extractor=None, headline_extractor=None, author_extractor=None, content_extractor=None, tags_extractor=None, media_extractor=None, related_extractor=None, subtitle_extractor=None, keywords=None, timeout=DEFAULT_TIMEOUT, pool_size=None, max_bytes=None, screen_fields=None, screen_bytes=SCREEN_BYTE_BUDGET, feed_url=None, plan=None, key=None, cache_ttl=None):
         self.name = name
+        # Registry key (e.g. 'cna'); labels this source in breaker state and metrics
+        self.key = key or name
         self.homepage_url = homepage_url
         self.link_filter = link_filter
         self.pubdate_extractor = pubdate_extractor
@@ -34,80 +50,194 @@ class GenericScraper:
         self.related_extractor = related_extractor
         self.subtitle_extractor = subtitle_extractor or (lambda soup: clean_text(soup.find('h2').text if soup.find('h2') else None))
         self.keywords = keywords or []
+        # (connect, read) seconds, keep-alive pool size for this host, optional response-size cap
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_bytes = max_bytes
+        # Compiled declarative extraction (see scraper_config); without one the
+        # *_extractor callables run against a BeautifulSoup tree
+        self.plan = plan
+        # Tags screen_html needs; candidate fetches stop once these are seen or screen_bytes are read
+        self.screen_fields = screen_fields or (plan.screen_fields() if plan else DEFAULT_SCREEN_FIELDS)
+        self.screen_bytes = screen_bytes
+        # Optional RSS/Atom/news sitemap; when set, discovery needs no per-article fetch
+        self.feed_url = feed_url
+        # Verdicts for the links on the last homepage, so only new links are screened (see discovery.py)
+        self.screened_links = ScreenedLinks()
+        # {'homepage'|'feed'|'article': seconds} overriding the HTTP cache lifetime the headers give
+        self.cache_ttl = cache_ttl or {}
 
-    def get_latest_articles(self):
-        resp = requests.get(self.homepage_url)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        now = datetime.utcnow()
-        articles = []
+    def _cache_kwargs(self, kind):
+        return {'cache_source': self.key, 'cache_ttl': self.cache_ttl.get(kind)}
+
+    def discover_links(self):
+        """Return the absolute article links on the homepage that pass link_filter."""
+        base = self.homepage_url.split('/')[0] + '//' + self.homepage_url.split('/')[2]
+        kwargs = {'max_bytes': self.max_bytes} if self.max_bytes else {}
+        links = []
         seen = set()
-        for a in soup.find_all('a', href=True):
-            link = a['href']
-            if not self.link_filter(link):
-                continue
-            if not link.startswith('http'):
-                # Build absolute URL
-                base = self.homepage_url.split('/')[0] + '//' + self.homepage_url.split('/')[2]
-                link = base + link
-            if link in seen:
-                continue
-            seen.add(link)
-            try:
-                article_resp = requests.get(link, timeout=5)
-                article_soup = BeautifulSoup(article_resp.text, 'html.parser')
-                pub_date = self.pubdate_extractor(article_soup)
-                if not pub_date:
-                    logger.warning(f"{self.name}: No publication date found for {link}, skipping article.")
-                    continue
-                if isinstance(pub_date, str):
-                    pub_dt = date_parser.parse(pub_date)
-                else:
-                    pub_dt = pub_date
-                if pub_dt.tzinfo is not None:
-                    pub_dt = pub_dt.replace(tzinfo=None)
-                if now - pub_dt > timedelta(hours=24):
+        with self.breaker.guard(), get_client().stream_capped(self.homepage_url, timeout=self.timeout, pool_size=self.pool_size, **kwargs, **self._cache_kwargs('homepage')) as (resp, chunks):
+            if resp.status_code >= 400:
+                raise HttpError(f"HTTP {resp.status_code} for {self.homepage_url}", resp.status_code)
+            # hrefs are matched as the page streams in; no parse tree is built
+            for link in iter_hrefs(chunks):
+                if not self.link_filter(link):
                     continue
-                # Keyword filter: check headline and content
-                headline = self.headline_extractor(article_soup)
-                subtitle = self.subtitle_extractor(article_soup)
-                matched_headline = contains_keywords(headline, self.keywords)
-                matched_subtitle = contains_keywords(subtitle, self.keywords)
-                if self.keywords and not (matched_headline or matched_subtitle):
-                    logger.info(f"{self.name}: Article at {link} does not match keywords, skipping.")
+                if not link.startswith('http'):
+                    # Build absolute URL
+                    link = base + link
+                if link in seen:
                     continue
-                articles.append((link, pub_dt))
-                time.sleep(0.2)
-            except Exception as e:
-                logger.warning(f"{self.name}: Error fetching {link}: {e}")
+                seen.add(link)
+                links.append(link)
+        return links
+
+    def discover_from_feed(self, now=None):
+        """Screen feed entries by date and title/summary keywords.
+
+        Returns (candidates, undated_links): (url, publication_date) tuples that
+        passed, and links the feed gave no date for, which still need a page fetch.
+        """
+        now = now or datetime.utcnow()
+        candidates = []
+        undated = []
+        seen = set()
+        for entry in parse_feed(self.fetch(self.feed_url, kind='feed')):
+            url = entry['url']
+            if url in seen:
+                continue
+            seen.add(url)
+            if entry['published'] is None:
+                undated.append(url)
+                continue
+            if now - entry['published'] > timedelta(hours=24):
                 continue
-        return articles
+            if SCREEN_KEYWORDS and self.keywords and not (contains_keywords(entry['title'], self.keywords) or contains_keywords(entry['summary'], self.keywords)):
+                continue
+            candidates.append((url, entry['published']))
+        return candidates, undated
+
+    @property
+    def breaker(self):
+        # Shared by every request to this source; see circuit.py
+        return get_breaker(self.key)
+
+    def fetch(self, url, kind='article'):
+        """Return the raw body bytes for url via the shared keep-alive client and HTTP cache."""
+        kwargs = {'max_bytes': self.max_bytes} if self.max_bytes else {}
+        with self.breaker.guard():
+            resp = get_client().get(url, timeout=self.timeout, pool_size=self.pool_size, **kwargs, **self._cache_kwargs(kind))
+            if resp.status_code >= 400:
+                raise HttpError(f"HTTP {resp.status_code} for {url}", resp.status_code)
+        return resp.content
+
+    def fetch_conditional(self, url, etag=None, last_modified=None, content_hash=None):
+        """Re-fetch url with the stored validators.
+
+        Returns (html, meta). html is None when the page is unchanged (a 304, or
+        the same sha256 as content_hash), in which case extraction can be skipped.
+        A fresh HTTP cache entry is not trusted here: the server is always asked.
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        kwargs = {'max_bytes': self.max_bytes} if self.max_bytes else {}
+        with self.breaker.guard():
+            resp = get_client().get(url, timeout=self.timeout, headers=headers or None, pool_size=self.pool_size,
+                                    revalidate=True, **kwargs, **self._cache_kwargs('article'))
+            if resp.status_code >= 400:
+                raise HttpError(f"HTTP {resp.status_code} for {url}", resp.status_code)
+        if resp.status_code == 304:
+            return None, {'article_url': url, 'unchanged': True}
+        meta = {
+            'article_url': url,
+            'content_hash': hashlib.sha256(resp.content).hexdigest(),
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'),
+        }
+        if content_hash and meta['content_hash'] == content_hash:
+            meta['unchanged'] = True
+            return None, meta
+        return resp.content, meta
+
+    def fetch_head(self, url):
+        """Stream just enough of url to cover screen_fields; the rest of the body is never downloaded."""
+        with self.breaker.guard(), get_client().stream_capped(url, timeout=self.timeout, pool_size=self.pool_size, chunk_size=SCREEN_CHUNK_SIZE, **self._cache_kwargs('article')) as (resp, chunks):
+            if resp.status_code >= 400:
+                raise HttpError(f"HTTP {resp.status_code} for {url}", resp.status_code)
+            return read_head(chunks, self.screen_fields, self.screen_bytes)
+
+    def extract(self, html, fields=FIELDS):
+        """Return {field: value} for the requested article fields."""
+        if self.plan is not None:
+            return self.plan.extract(html, fields)
+        soup = BeautifulSoup(html, 'html.parser')
+        extractors = {
+            'headline': self.headline_extractor,
+            'subtitle': self.subtitle_extractor,
+            'publication_date': self.pubdate_extractor,
+            'author': self.author_extractor,
+            'content': self.content_extractor,
+            'tags': self.tags_extractor,
+            'media_urls': self.media_extractor,
+            'related_articles': self.related_extractor,
+        }
+        return {
+            field: extractors[field](soup) if extractors[field] else ([] if field in LIST_FIELDS else None)
+            for field in fields
+        }
+
+    def screen_html(self, link, html, now=None):
+        """Return the naive UTC publication datetime if the page is recent and matches keywords, else None."""
+        now = now or datetime.utcnow()
+        fields = self.extract(html, SCREEN_FIELDS)
+        pub_date = fields['publication_date']
+        if not pub_date:
+            logger.warning(f"{self.name}: No publication date found for {link}, skipping article.")
+            return None
+        if isinstance(pub_date, str):
+            pub_dt = date_parser.parse(pub_date)
+        else:
+            pub_dt = pub_date
+        pub_dt = to_naive_utc(pub_dt)
+        if now - pub_dt > timedelta(hours=24):
+            return None
+        # Keyword filter: check headline and content
+        matched_headline = contains_keywords(fields['headline'], self.keywords)
+        matched_subtitle = contains_keywords(fields['subtitle'], self.keywords)
+        if SCREEN_KEYWORDS and self.keywords and not (matched_headline or matched_subtitle):
+            logger.info(f"{self.name}: Article at {link} does not match keywords, skipping.")
+            return None
+        return pub_dt
+
+    def get_latest_articles(self):
+        # Same discovery and screening as the job, so the two cannot drift apart
+        from .pipeline import find_candidates
+        return find_candidates(self.key, self)
 
     def scrape(self, url):
         try:
-            resp = requests.get(url, timeout=10)
-            soup = BeautifulSoup(resp.text, 'html.parser')
+            html = self.fetch(url)
         except Exception as e:
             logger.warning(f"{self.name}: Failed to load {url}: {e}")
             return {'error': 'Failed to load page', 'article_url': url}
-        data = {}
-        data['article_url'] = url
-        data['headline'] = self.headline_extractor(soup)
-        data['subtitle'] = self.subtitle_extractor(soup)
-        pub_date = self.pubdate_extractor(soup)
-        if not pub_date:
+        return self.parse(url, html)
+
+    def parse(self, url, html):
+        data = {'article_url': url, 'source': self.key}
+        # One extraction pass for every field
+        data.update(self.extract(html))
+        if not data['publication_date']:
             logger.warning(f"{self.name}: No publication date found for {url}, skipping article.")
             return None
-        data['publication_date'] = pub_date
-        data['author'] = self.author_extractor(soup)
-        data['content'] = self.content_extractor(soup)
-        matched_headline = contains_keywords(data['headline'], self.keywords)
-        matched_subtitle = contains_keywords(data['subtitle'], self.keywords)
-        # Keyword filter: check headline and subtitle
-        if self.keywords and not (matched_headline or matched_subtitle):
-            logger.info(f"{self.name}: Article at {url} does not match keywords, skipping.")
-            return None
-        data['keywords'] = list(set(matched_headline + matched_subtitle))
-        data['tags'] = self.tags_extractor(soup)
-        data['media_urls'] = self.media_extractor(soup)
-        data['related_articles'] = self.related_extractor(soup)
-        return data 
\ No newline at end of file
+        if self.keywords:
+            # Per-field keyword counts for the writer's RelevanceScorer, which decides what is kept
+            counter = get_counter(self.keywords)
+            data['term_counts'] = counter.field_counts(data)
+            data['keywords'] = counter.matched(data['term_counts'][0])
+        else:
+            data['keywords'] = []
+        data['locations'] = find_locations(data['headline'], data['subtitle'], data['content'], *(data['tags'] or []))
+        return data
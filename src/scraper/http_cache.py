@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from requests.structures import CaseInsensitiveDict
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Two-level cache for scraper GETs: an in-memory LRU over a SQLite file, so a
+# restart or a /scrape-now right after a scheduled job reuses what was just
+# downloaded. Freshness follows Cache-Control (max-age, no-cache, no-store),
+# Age and Expires, with a heuristic from Last-Modified; stale entries with an
+# ETag or Last-Modified are revalidated and a 304 is answered from the cache.
+# A source's "cache_ttl" in sources.json ({"homepage": 300, "feed": ..,
+# "article": ..}) replaces the computed lifetime for pages whose headers are
+# wrong about caching. SCRAPER_HTTP_CACHE_PATH='' keeps the memory level only.
+HTTP_CACHE = os.getenv('SCRAPER_HTTP_CACHE', '1') == '1'
+HTTP_CACHE_PATH = os.getenv('SCRAPER_HTTP_CACHE_PATH', 'http_cache.db')
+MEMORY_BYTES = int(os.getenv('SCRAPER_HTTP_CACHE_MEMORY_BYTES', str(32 * 1024 * 1024)))
+DISK_BYTES = int(os.getenv('SCRAPER_HTTP_CACHE_DISK_BYTES', str(512 * 1024 * 1024)))
+# Entries older than this are dropped even if they could still be revalidated
+RETENTION_SECONDS = float(os.getenv('SCRAPER_HTTP_CACHE_RETENTION_SECONDS', str(24 * 3600)))
+# Cap on the Last-Modified heuristic (10% of the page's age) when no lifetime is given
+HEURISTIC_MAX_SECONDS = 3600
+# The disk level is trimmed to DISK_BYTES every this many stores
+PRUNE_EVERY = 200
+
+KEPT_HEADERS = ('content-type', 'etag', 'last-modified', 'cache-control', 'expires', 'date')
+
+def parse_cache_control(value):
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip().strip('"')
+    return directives
+
+def _http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def freshness_lifetime(headers, now, ttl=None):
+    """Seconds a response stays fresh, or None if it must not be stored."""
+    if ttl is not None:
+        return float(ttl)
+    cc = parse_cache_control(headers.get('Cache-Control'))
+    if 'no-store' in cc or headers.get('Vary', '').strip() == '*':
+        return None
+    if 'no-cache' in cc:
+        return 0.0
+    age = headers.get('Age') or ''
+    age = float(age) if age.isdigit() else 0.0
+    if 'max-age' in cc:
+        try:
+            return max(0.0, float(cc['max-age']) - age)
+        except ValueError:
+            return 0.0
+    date = _http_date(headers.get('Date')) or now
+    if headers.get('Expires'):
+        expires = _http_date(headers['Expires'])
+        return max(0.0, expires - date - age) if expires else 0.0
+    last_modified = _http_date(headers.get('Last-Modified'))
+    if last_modified and last_modified < date:
+        return min((date - last_modified) / 10, HEURISTIC_MAX_SECONDS)
+    return 0.0
+
+class Entry:
+    __slots__ = ('url', 'headers', 'body', 'stored_at', 'expires_at')
+
+    def __init__(self, url, headers, body, stored_at, expires_at):
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    def fresh(self, now=None):
+        return (now or time.time()) < self.expires_at
+
+    def validators(self):
+        headers = {}
+        if self.headers.get('etag'):
+            headers['If-None-Match'] = self.headers['etag']
+        if self.headers.get('last-modified'):
+            headers['If-Modified-Since'] = self.headers['last-modified']
+        return headers
+
+class HttpCache:
+    def __init__(self, path=HTTP_CACHE_PATH, memory_bytes=MEMORY_BYTES, disk_bytes=DISK_BYTES):
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # url -> Entry, least recently used first
+        self._memory_size = 0
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._stores = 0
+        self._stats = {}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS http_cache (url TEXT PRIMARY KEY, headers TEXT, body BLOB, '
+                'size INTEGER, stored_at REAL, expires_at REAL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS ix_http_cache_stored_at ON http_cache (stored_at)')
+            self._db.commit()
+            self.prune()
+
+    def _remember(self, entry):
+        # Caller holds the lock
+        old = self._memory.pop(entry.url, None)
+        if old is not None:
+            self._memory_size -= len(old.body)
+        if len(entry.body) > self.memory_bytes:
+            return
+        self._memory[entry.url] = entry
+        self._memory_size += len(entry.body)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted.body)
+
+    def lookup(self, url, now=None):
+        now = now or time.time()
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                self._memory.move_to_end(url)
+            elif self._db is not None:
+                row = self._db.execute(
+                    'SELECT headers, body, stored_at, expires_at FROM http_cache WHERE url = ?', (url,)
+                ).fetchone()
+                if row is not None:
+                    entry = Entry(url, json.loads(row[0]), zlib.decompress(row[1]), row[2], row[3])
+                    self._remember(entry)
+        if entry is not None and now - entry.stored_at > RETENTION_SECONDS:
+            return None
+        return entry
+
+    def store(self, url, headers, body, lifetime, now=None):
+        now = now or time.time()
+        kept = {name: headers[name] for name in KEPT_HEADERS if headers.get(name)}
+        entry = Entry(url, kept, body, now, now + lifetime)
+        with self._lock:
+            self._remember(entry)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO http_cache (url, headers, body, size, stored_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    (url, json.dumps(kept), zlib.compress(body, 1), len(body), now, entry.expires_at),
+                )
+                self._db.commit()
+                self._stores += 1
+        if self._db is not None and self._stores % PRUNE_EVERY == 0:
+            self.prune(now)
+        return entry
+
+    def refresh(self, entry, headers, ttl=None, now=None):
+        """Extend entry after a 304; headers from the 304 replace the stored ones."""
+        now = now or time.time()
+        merged = dict(entry.headers, **{name: headers[name] for name in KEPT_HEADERS if headers.get(name)})
+        lifetime = freshness_lifetime(CaseInsensitiveDict(merged), now, ttl) or 0.0
+        return self.store(entry.url, merged, entry.body, lifetime, now)
+
+    def storing(self, url, headers, chunks, lifetime):
+        """Pass chunks through, storing the body once it has been read to the end."""
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        self.store(url, headers, b''.join(parts), lifetime)
+
+    def prune(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            self._db.execute('DELETE FROM http_cache WHERE stored_at < ?', (now - RETENTION_SECONDS,))
+            total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM http_cache').fetchone()[0]
+            if total > self.disk_bytes:
+                # Oldest first until back under the budget
+                cutoff = 0
+                for size, stored_at in self._db.execute('SELECT size, stored_at FROM http_cache ORDER BY stored_at'):
+                    total -= size
+                    cutoff = stored_at
+                    if total <= self.disk_bytes:
+                        break
+                self._db.execute('DELETE FROM http_cache WHERE stored_at <= ?', (cutoff,))
+            self._db.commit()
+
+    def record(self, source, result, saved=0):
+        """Count a lookup for source: 'hit', 'revalidated' (304) or 'miss'; saved is body bytes not downloaded."""
+        with self._lock:
+            stats = self._stats.setdefault(source, {'hit': 0, 'revalidated': 0, 'miss': 0, 'bytes_saved': 0})
+            stats[result] += 1
+            stats['bytes_saved'] += saved
+        metrics.inc('scrape_http_cache_requests_total', source=source, result=result)
+        if saved:
+            metrics.inc('scrape_http_cache_bytes_saved_total', saved, source=source)
+
+    def stats(self, source):
+        """{'hit', 'revalidated', 'miss', 'bytes_saved', 'hit_ratio'} since this process started."""
+        with self._lock:
+            stats = dict(self._stats.get(source, {'hit': 0, 'revalidated': 0, 'miss': 0, 'bytes_saved': 0}))
+        lookups = stats['hit'] + stats['revalidated'] + stats['miss']
+        stats['hit_ratio'] = (stats['hit'] + stats['revalidated']) / lookups if lookups else 0.0
+        return stats
+
+metrics.describe('scrape_http_cache_requests_total', 'Scraper HTTP cache lookups, by source and result (hit, revalidated, miss).')
+metrics.describe('scrape_http_cache_bytes_saved_total', 'Response body bytes served from the HTTP cache instead of downloaded.')
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_http_cache():
+    """Return the process-wide cache, or None when SCRAPER_HTTP_CACHE=0."""
+    global _cache
+    if _cache is None and HTTP_CACHE:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HttpCache()
+    return _cache
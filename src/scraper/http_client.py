@@ -0,0 +1,170 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from .http_cache import get_http_cache, freshness_lifetime
+
+try:
+    import brotli  # noqa: F401 -- urllib3/httpx decode 'br' when this is importable
+    _BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        _BROTLI = True
+    except ImportError:
+        _BROTLI = False
+
+try:
+    import httpx
+    import h2  # noqa: F401
+except ImportError:  # optional: only needed when SCRAPER_HTTP2=1
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+HTTP2 = os.getenv('SCRAPER_HTTP2', '0') == '1'
+DEFAULT_POOL_SIZE = int(os.getenv('SCRAPER_POOL_SIZE', '4'))
+MAX_RESPONSE_BYTES = int(os.getenv('SCRAPER_MAX_RESPONSE_BYTES', str(5 * 1024 * 1024)))
+DEFAULT_TIMEOUT = (5, 10)  # (connect, read) seconds
+# The read timeout applies per socket read; this caps a whole body that trickles in
+MAX_RESPONSE_SECONDS = float(os.getenv('SCRAPER_MAX_RESPONSE_SECONDS', '30'))
+ACCEPT_ENCODING = 'gzip, deflate, br' if _BROTLI else 'gzip, deflate'
+USER_AGENT = os.getenv('SCRAPER_USER_AGENT', 'Mozilla/5.0 (compatible; disaster-news-scraper)')
+CHUNK_SIZE = 64 * 1024
+
+class HttpError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class ResponseTooLarge(HttpError):
+    pass
+
+class Response:
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+class HttpClient:
+    """Process-wide HTTP client shared by all scrapers.
+
+    Uses one requests.Session with a keep-alive pool mounted per host, or an
+    httpx HTTP/2 client when SCRAPER_HTTP2=1 and httpx[http2] is installed.
+    Bodies are streamed so responses over max_bytes are cut off early.
+    """
+
+    def __init__(self, http2=HTTP2):
+        self._lock = threading.Lock()
+        self._hosts = set()
+        self._session = requests.Session()
+        self._session.headers.update({'Accept-Encoding': ACCEPT_ENCODING, 'User-Agent': USER_AGENT})
+        self._h2 = None
+        if http2:
+            if httpx is None:
+                logger.warning("SCRAPER_HTTP2=1 but httpx[http2] is not installed; using HTTP/1.1.")
+            else:
+                self._h2 = httpx.Client(http2=True, follow_redirects=True,
+                                        headers={'Accept-Encoding': ACCEPT_ENCODING, 'User-Agent': USER_AGENT})
+
+    def _mount(self, url, pool_size):
+        parts = urlsplit(url)
+        prefix = f"{parts.scheme}://{parts.netloc}/"
+        if prefix in self._hosts:
+            return
+        with self._lock:
+            if prefix not in self._hosts:
+                size = pool_size or DEFAULT_POOL_SIZE
+                self._session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=size))
+                self._hosts.add(prefix)
+
+    @contextmanager
+    def stream(self, url, timeout=DEFAULT_TIMEOUT, headers=None, pool_size=None, chunk_size=CHUNK_SIZE):
+        """Yield (response, chunks) with the body unread.
+
+        Leaving the block before the body is exhausted closes that connection
+        instead of returning it to the pool.
+        """
+        if self._h2 is not None:
+            connect, read = timeout
+            with self._h2.stream('GET', url, headers=headers, timeout=httpx.Timeout(read, connect=connect)) as resp:
+                yield Response(str(resp.url), resp.status_code, resp.headers, None), resp.iter_bytes(chunk_size)
+            return
+        self._mount(url, pool_size)
+        with self._session.get(url, timeout=timeout, headers=headers, stream=True) as resp:
+            yield Response(resp.url, resp.status_code, resp.headers, None), resp.iter_content(chunk_size)
+
+    @contextmanager
+    def stream_capped(self, url, timeout=DEFAULT_TIMEOUT, headers=None, pool_size=None, max_bytes=MAX_RESPONSE_BYTES,
+                      chunk_size=CHUNK_SIZE, cache_source=None, cache_ttl=None, revalidate=False):
+        """Like stream(), but the chunks stop with an error past max_bytes or MAX_RESPONSE_SECONDS.
+
+        With cache_source (the source key, for stats) the request goes through
+        the HTTP cache; cache_ttl overrides the lifetime the headers give.
+        revalidate (max-age=0) skips fresh entries, for callers asking whether
+        the page changed; so do the caller's own conditional headers, whose
+        304 is passed through.
+        """
+        cache = get_http_cache() if cache_source else None
+        entry = cache.lookup(url) if cache is not None else None
+        if entry is not None and entry.fresh() and not revalidate and not headers:
+            cache.record(cache_source, 'hit', len(entry.body))
+            yield Response(url, 200, CaseInsensitiveDict(entry.headers), None), iter((entry.body,))
+            return
+        revalidating = entry is not None and not headers and bool(entry.validators())
+        if revalidating:
+            headers = entry.validators()
+        with self.stream(url, timeout, headers, pool_size, chunk_size) as (resp, chunks):
+            if revalidating and resp.status_code == 304:
+                entry = cache.refresh(entry, resp.headers, cache_ttl)
+                cache.record(cache_source, 'revalidated', len(entry.body))
+                yield Response(url, 200, CaseInsensitiveDict(entry.headers), None), iter((entry.body,))
+                return
+            _check_length(url, resp.headers, max_bytes)
+            chunks = _iter_capped(url, chunks, max_bytes, time.monotonic() + MAX_RESPONSE_SECONDS)
+            if cache is not None:
+                cache.record(cache_source, 'miss')
+                lifetime = freshness_lifetime(resp.headers, time.time(), cache_ttl) if resp.status_code == 200 else None
+                # Worth keeping if it is fresh for a while or can be revalidated later
+                if lifetime is not None and (lifetime > 0 or resp.headers.get('ETag') or resp.headers.get('Last-Modified')):
+                    chunks = cache.storing(url, resp.headers, chunks, lifetime)
+            yield resp, chunks
+
+    def get(self, url, timeout=DEFAULT_TIMEOUT, headers=None, pool_size=None, max_bytes=MAX_RESPONSE_BYTES,
+            cache_source=None, cache_ttl=None, revalidate=False):
+        with self.stream_capped(url, timeout, headers, pool_size, max_bytes,
+                                cache_source=cache_source, cache_ttl=cache_ttl, revalidate=revalidate) as (resp, chunks):
+            resp.content = b''.join(chunks)
+            return resp
+
+def _check_length(url, headers, max_bytes):
+    length = headers.get('Content-Length')
+    if max_bytes and length and length.isdigit() and int(length) > max_bytes:
+        raise ResponseTooLarge(f"{url}: Content-Length {length} exceeds {max_bytes} bytes")
+
+def _iter_capped(url, chunks, max_bytes, deadline=None):
+    received = 0
+    for chunk in chunks:
+        received += len(chunk)
+        if max_bytes and received > max_bytes:
+            raise ResponseTooLarge(f"{url}: body exceeds {max_bytes} bytes")
+        if deadline and time.monotonic() > deadline:
+            raise HttpError(f"{url}: body not received within {MAX_RESPONSE_SECONDS:.0f}s")
+        yield chunk
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
@@ -0,0 +1,105 @@
+import os
+import re
+import json
+
+# Location extraction against an offline gazetteer (countries, their provinces
+# or states, and major cities). Every name is compiled into a word-level trie,
+# so one left-to-right pass over an article's tokens finds all place names,
+# longest match first ("Papua New Guinea" before "Guinea", "Quezon City"
+# before "Quezon"). Results are stored in article_locations for /articles?country=.
+#
+# gazetteer.json maps ISO 3166-1 alpha-2 codes to
+#   {"name": ..., "aliases": [...], "regions": {region: [cities]}, "cities": [...]}
+# where "cities" are places not assigned to a region.
+GAZETTEER_FILE = os.getenv('GAZETTEER_FILE', os.path.join(os.path.dirname(__file__), 'gazetteer.json'))
+
+_TOKEN_RE = re.compile(r'\w+')
+_PLACES = '\0'  # trie key for the places a complete name refers to
+
+class Gazetteer:
+    def __init__(self, entries):
+        self.trie = {}
+        for code, country in entries.items():
+            self._add(country['name'], code, None)
+            for alias in country.get('aliases', ()):
+                self._add(alias, code, None, place=country['name'])
+            for region, cities in country.get('regions', {}).items():
+                self._add(region, code, region)
+                for city in cities:
+                    self._add(city, code, region)
+            for city in country.get('cities', ()):
+                self._add(city, code, None)
+
+    def _add(self, name, country, region, place=None):
+        tokens = _TOKEN_RE.findall(name)
+        node = self.trie
+        for token in tokens:
+            node = node.setdefault(token.lower(), {})
+        # Acronyms ("US", "DRC") must match exactly, so "us" is never the United States
+        exact = tokens if name.isupper() else None
+        node.setdefault(_PLACES, []).append((country, region, place or name, exact))
+
+    def _matches(self, tokens):
+        # Yields the candidate places for each name found, longest match at each position
+        i = 0
+        n = len(tokens)
+        while i < n:
+            node = self.trie
+            match = None
+            j = i
+            while j < n:
+                node = node.get(tokens[j].lower())
+                if node is None:
+                    break
+                j += 1
+                if _PLACES in node:
+                    match = (j, node[_PLACES])
+            if match:
+                end, places = match
+                found = tokens[i:end]
+                # Proper nouns only: "turkey" or "chad" in lower case is not a place
+                candidates = [p for p in places if (found == p[3] if p[3] else found[0][0].isupper())]
+                if candidates:
+                    yield candidates
+                    i = end
+                    continue
+            i += 1
+
+    def locate(self, *texts):
+        """Return [{'country', 'region', 'place', 'mentions'}] for the places named in texts, most mentioned first."""
+        mentions = {}
+        ambiguous = []
+        for text in texts:
+            if not text:
+                continue
+            for candidates in self._matches(_TOKEN_RE.findall(text)):
+                if len({p[0] for p in candidates}) > 1:
+                    ambiguous.append(candidates)
+                    continue
+                for country, region, place, _ in candidates:
+                    mentions[country, region, place] = mentions.get((country, region, place), 0) + 1
+        # A name shared by several countries ("Georgia", "Punjab") goes to those the
+        # article otherwise mentions, or to all of them if it mentions none
+        countries = {key[0] for key in mentions}
+        for candidates in ambiguous:
+            preferred = [p for p in candidates if p[0] in countries] or candidates
+            for country, region, place, _ in preferred:
+                mentions[country, region, place] = mentions.get((country, region, place), 0) + 1
+        ranked = sorted(mentions.items(), key=lambda item: -item[1])
+        return [
+            {'country': country, 'region': region, 'place': place, 'mentions': count}
+            for (country, region, place), count in ranked
+        ]
+
+_gazetteer = None
+
+def get_gazetteer():
+    # Built on first use in each process (a few ms), then reused for every article
+    global _gazetteer
+    if _gazetteer is None:
+        with open(GAZETTEER_FILE, encoding='utf-8') as f:
+            _gazetteer = Gazetteer(json.load(f))
+    return _gazetteer
+
+def find_locations(*texts):
+    return get_gazetteer().locate(*texts)
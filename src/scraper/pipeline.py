@@ -0,0 +1,259 @@
+import os
+import heapq
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from src.metrics import metrics
+from src import profiling
+from .circuit import CircuitOpenError
+from .discovery import HOMEPAGE_DIFF
+
+logger = logging.getLogger(__name__)
+
+# Stage 1 (I/O): threads fetching raw HTML, or just the page head for screening.
+# Stage 2 (CPU): processes running BeautifulSoup, the extractors and keyword
+# matching. Stage 3 (writer): the caller consuming the generators below
+# persists results on a single thread.
+FETCH_WORKERS = int(os.getenv('SCRAPE_FETCH_WORKERS', '4'))
+PARSE_WORKERS = int(os.getenv('SCRAPE_PARSE_WORKERS', str(os.cpu_count() or 1)))
+# Pages fetched or being parsed at once; bounds memory however many urls a source yields
+IN_FLIGHT = int(os.getenv('SCRAPE_IN_FLIGHT', str(2 * max(FETCH_WORKERS, PARSE_WORKERS))))
+# Candidates kept per source (most recent first); 0 means no limit
+MAX_ARTICLES_PER_SOURCE = int(os.getenv('SCRAPE_MAX_ARTICLES_PER_SOURCE', '100'))
+# How often a stage loop re-checks its stop condition while waiting on slow fetches
+STOP_POLL_SECONDS = 1.0
+
+_parse_pool = None
+
+def get_scraper(name):
+    # Imported lazily so each worker process builds the registry on first use;
+    # only the scraper name crosses the process boundary, never the lambdas.
+    from .scraper_config import ALL_SCRAPERS
+    return ALL_SCRAPERS[name]
+
+# screen_task's result when screening raised, as opposed to None for a rejected link
+SCREEN_FAILED = 'failed'
+
+def screen_task(name, url, html, now):
+    try:
+        return get_scraper(name).screen_html(url, html, now)
+    except Exception as e:
+        logger.warning(f"{name}: Error screening {url}: {e}")
+        return SCREEN_FAILED
+
+def parse_task(name, url, html):
+    try:
+        return get_scraper(name).parse(url, html)
+    except Exception as e:
+        logger.warning(f"{name}: Error parsing {url}: {e}")
+        return None
+
+def get_parse_pool():
+    """Return the shared process pool, or None to parse inline when PARSE_WORKERS <= 1."""
+    global _parse_pool
+    if _parse_pool is None and PARSE_WORKERS > 1:
+        # spawn, not fork: the API process runs scheduler and server threads
+        _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _parse_pool
+
+def shutdown_parse_pool():
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(cancel_futures=True)
+        _parse_pool = None
+
+def _fetch(name, fetch, url):
+    try:
+        return url, fetch(url)
+    except CircuitOpenError:
+        metrics.inc('scrape_urls_skipped_total', source=name, reason='circuit_open')
+        return url, None
+    except Exception as e:
+        logger.warning(f"{name}: Error fetching {url}: {e}")
+        return url, None
+
+def _skip_rest(name, urls, reason):
+    skipped = sum(1 for _ in urls)
+    if skipped:
+        metrics.inc('scrape_urls_skipped_total', skipped, source=name, reason=reason)
+        logger.warning(f"{name}: {skipped} urls skipped ({reason}).")
+
+def _run_stages(name, fetch, urls, task, *args, stop=None, stage='article'):
+    """Fetch urls with fetch on I/O threads and hand each page to the parse pool as soon as it arrives.
+
+    fetch returns (html, extra). When html is None the parse stage is skipped
+    and extra is yielded as the result; otherwise extra is merged into the
+    parsed dict. Yields (url, result) in completion order.
+
+    urls is consumed lazily and at most IN_FLIGHT fetches plus parses are
+    pending, so a slow consumer holds back fetching instead of buffering pages.
+
+    stop, if given, returns a reason string once no more urls should be
+    fetched. On 'deadline' pending work is abandoned too; for any other reason
+    (e.g. 'circuit_open') it is allowed to finish.
+
+    stage names the work in a profiled job ('<stage>_fetch', '<stage>_parse').
+    """
+    pool = get_parse_pool()
+    profile = profiling.active()
+    fetch_stage = f'{stage}_fetch'
+    parse_stage = f'{stage}_parse'
+    urls = iter(urls)
+    io_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+    fetches = set()
+    parses = {}
+    exhausted = False
+    abandoned = False
+    try:
+        while True:
+            reason = stop() if stop else None
+            if reason and not exhausted:
+                _skip_rest(name, urls, reason)
+                exhausted = True
+            if reason == 'deadline':
+                abandoned = True
+                pending = len(fetches) + len(parses)
+                if pending:
+                    metrics.inc('scrape_urls_skipped_total', pending, source=name, reason=reason)
+                return
+            while not exhausted and len(fetches) + len(parses) < IN_FLIGHT:
+                url = next(urls, None)
+                if url is None:
+                    exhausted = True
+                else:
+                    if profile is None:
+                        fetches.add(io_pool.submit(_fetch, name, fetch, url))
+                    else:
+                        fetches.add(io_pool.submit(profile.call, name, fetch_stage, _fetch, name, fetch, url))
+            if not fetches and not parses:
+                return
+            done, _ = wait(fetches | parses.keys(), timeout=STOP_POLL_SECONDS if stop else None, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut in parses:
+                    url, extra = parses.pop(fut)
+                    try:
+                        result = fut.result()
+                        if profile is not None:
+                            result, stats = result
+                            profile.add(name, parse_stage, stats)
+                        yield url, _merge(result, extra)
+                    except Exception as e:
+                        logger.warning(f"{name}: Parse worker failed for {url}: {e}")
+                    continue
+                fetches.discard(fut)
+                url, fetched = fut.result()
+                if fetched is None:
+                    continue
+                html, extra = fetched
+                if html is None:
+                    if extra is not None:
+                        yield url, extra
+                    continue
+                if pool is None:
+                    with profiling.stage(name, parse_stage):
+                        result = task(name, url, html, *args)
+                    yield url, _merge(result, extra)
+                elif profile is None:
+                    parses[pool.submit(task, name, url, html, *args)] = (url, extra)
+                else:
+                    # The worker profiles the task and sends its stats back with the result
+                    parses[pool.submit(profiling.profiled_task, task, name, url, html, *args)] = (url, extra)
+    finally:
+        # Past the deadline, in-flight requests finish on their own (bounded by the HTTP timeouts)
+        for fut in parses:
+            fut.cancel()
+        io_pool.shutdown(wait=not abandoned, cancel_futures=True)
+
+def _merge(result, extra):
+    if extra and isinstance(result, dict):
+        result.update(extra)
+    return result
+
+class CandidateQueue:
+    """Keeps the `limit` most recently published candidates, deduplicated by url."""
+
+    def __init__(self, limit=MAX_ARTICLES_PER_SOURCE):
+        self.limit = limit
+        self._heap = []  # (publication_date, url); the oldest is evicted first
+        self._urls = set()
+        self.dropped = 0
+
+    def push(self, url, pub_dt):
+        if url in self._urls:
+            return
+        if self.limit and len(self._heap) >= self.limit:
+            if pub_dt <= self._heap[0][0]:
+                self.dropped += 1
+                return
+            _, evicted = heapq.heapreplace(self._heap, (pub_dt, url))
+            self._urls.discard(evicted)
+            self.dropped += 1
+        else:
+            heapq.heappush(self._heap, (pub_dt, url))
+        self._urls.add(url)
+
+    def drain(self):
+        """Return the kept (url, publication_date) tuples, most recent first."""
+        items = sorted(self._heap, reverse=True)
+        self._heap = []
+        self._urls = set()
+        return [(url, pub_dt) for pub_dt, url in items]
+
+def find_candidates(name, scraper, limit=MAX_ARTICLES_PER_SOURCE, stop=None):
+    """Return up to limit (url, publication_date) tuples for recent, on-topic articles, newest first."""
+    now = datetime.utcnow()
+    queue = CandidateQueue(limit)
+    links = None
+    if scraper.feed_url:
+        try:
+            with profiling.stage(name, 'discover'):
+                candidates, links = scraper.discover_from_feed(now)
+            for url, pub_dt in candidates:
+                queue.push(url, pub_dt)
+        except Exception as e:
+            logger.warning(f"{name}: Error reading feed {scraper.feed_url}, falling back to homepage: {e}")
+    if links is None:
+        try:
+            with profiling.stage(name, 'discover'):
+                links = scraper.discover_links()
+        except Exception as e:
+            logger.warning(f"{name}: Error fetching homepage {scraper.homepage_url}: {e}")
+            return []
+    to_screen = links
+    if HOMEPAGE_DIFF:
+        # Links still listed since last run keep their verdict; only new ones are fetched
+        to_screen, known = scraper.screened_links.split(links, now)
+        for url, pub_dt in known.items():
+            if pub_dt:
+                queue.push(url, pub_dt)
+        if known:
+            logger.info(f"{name}: {len(to_screen)} new links, {len(known)} already screened.")
+    screened = {}
+    for url, pub_dt in _run_stages(name, lambda url: (scraper.fetch_head(url), None), to_screen, screen_task, now, stop=stop, stage='screen'):
+        if pub_dt == SCREEN_FAILED:
+            continue  # no verdict, so the next run screens it again
+        screened[url] = pub_dt
+        if pub_dt:
+            queue.push(url, pub_dt)
+    if HOMEPAGE_DIFF:
+        scraper.screened_links.update(links, screened)
+    if queue.dropped:
+        logger.info(f"{name}: {queue.dropped} older candidates dropped (limit {limit} per source).")
+    return queue.drain()
+
+def scrape_articles(name, scraper, urls, validators=None, stop=None):
+    """Yield extracted article dicts for urls; the consumer is the single writer stage.
+
+    validators maps url -> (etag, last_modified, content_hash) of the stored
+    copy. Pages found unchanged are yielded as {'article_url', 'unchanged': True, ...}
+    without being parsed.
+    """
+    validators = validators or {}
+
+    def fetch(url):
+        return scraper.fetch_conditional(url, *validators.get(url, ()))
+
+    for url, data in _run_stages(name, fetch, urls, parse_task, stop=stop):
+        if data:
+            yield data
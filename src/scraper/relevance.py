@@ -0,0 +1,105 @@
+import os
+import re
+import itertools
+import numpy as np
+from .keywords import KEYWORDS
+
+# Relevance replaces the yes/no keyword filter: parse() counts keyword hits per
+# field in the worker, and the writer scores each batch with one vectorized
+# TF-IDF pass. Document frequencies come from the window's articles, read once
+# when the job starts: the stored ones and those scored too low to store, so
+# terms common in unrelated news count for less than ones found mostly in
+# disaster stories, and an article's score does not depend on which articles
+# the job happened to score before it.
+
+# Terms that often appear outside disaster news ("ash" as a name, "gale" in
+# sports or weather chatter) count for less; everything else weighs 1.0
+TERM_WEIGHTS = {
+    'ash': 0.2, 'gale': 0.2, 'lava': 0.5, 'tremor': 0.5, 'twister': 0.5,
+    'lightning': 0.5, 'subsidence': 0.5, 'seismic': 0.75, 'disaster': 0.75,
+}
+# A hit in the headline says more about the story than one in the body
+FIELD_WEIGHTS = {'headline': 3.0, 'subtitle': 2.0, 'content': 1.0}
+# BM25 saturation for the body, so long articles don't win on length alone
+BODY_K1 = 1.2
+BODY_B = 0.75
+# Body length BM25 normalizes against: a fixed reference, not a running average
+REFERENCE_BODY_WORDS = int(os.getenv('SCRAPE_RELEVANCE_BODY_WORDS', '600'))
+# Raw score at which relevance reaches 1 - 1/e; relevance is in [0, 1)
+SCORE_SCALE = 3.0
+# Articles scoring below this are not stored. A single body-only mention of a
+# full-weight term scores at least 0.2 in an article of reference length, and
+# about 0.15 at twice that, whatever the term's document frequency.
+MIN_RELEVANCE = float(os.getenv('SCRAPE_MIN_RELEVANCE', '0.15'))
+
+_WORD_RE = re.compile(r'\w+')
+
+class TermCounter:
+    """Counts keyword occurrences with one compiled alternation per keyword list."""
+
+    def __init__(self, keywords=KEYWORDS):
+        self.keywords = list(keywords)
+        self.index = {kw.lower(): i for i, kw in enumerate(self.keywords)}
+        # Longest first, so 'flash flood' is counted once rather than also as 'flood'
+        terms = sorted(self.index, key=len, reverse=True)
+        self.pattern = re.compile(r'\b(?:' + '|'.join(re.escape(t) for t in terms) + r')\b')
+
+    def counts(self, text):
+        """Return an int32 vector of keyword counts for text."""
+        if not text:
+            return np.zeros(len(self.keywords), dtype=np.int32)
+        hits = [self.index[m] for m in self.pattern.findall(text.lower())]
+        return np.bincount(hits, minlength=len(self.keywords)).astype(np.int32)
+
+    def field_counts(self, data):
+        """Return (counts matrix of shape (fields, keywords), body length in words) for a parsed article."""
+        counts = np.stack([self.counts(data.get(field)) for field in FIELD_WEIGHTS])
+        return counts, len(_WORD_RE.findall(data.get('content') or ''))
+
+    def matched(self, counts):
+        return [self.keywords[i] for i in np.flatnonzero(counts.sum(axis=0))]
+
+_counters = {}
+
+def get_counter(keywords):
+    key = tuple(keywords)
+    if key not in _counters:
+        _counters[key] = TermCounter(key)
+    return _counters[key]
+
+class RelevanceScorer:
+    """Scores batches of parsed articles carrying 'term_counts' (see GenericScraper.parse).
+
+    IDF is fixed at construction from reference documents, given as the
+    keyword lists they matched: the stored window's `keywords` column, and
+    as background the lists of articles rejected below MIN_RELEVANCE.
+    Scoring does not change it.
+    """
+
+    def __init__(self, keywords=KEYWORDS, reference=(), background=()):
+        self.keywords = list(keywords)
+        self.term_weights = np.array([TERM_WEIGHTS.get(kw, 1.0) for kw in self.keywords])
+        self.field_weights = np.array(list(FIELD_WEIGHTS.values()))
+        index = {kw: i for i, kw in enumerate(self.keywords)}
+        doc_freq = np.zeros(len(self.keywords))
+        docs = 0
+        for matched in itertools.chain(reference, background):
+            docs += 1
+            for i in {index[kw] for kw in matched if kw in index}:
+                doc_freq[i] += 1
+        # Smoothed so a term found in every article still counts for something
+        self.idf = np.log1p((docs + 1) / (doc_freq + 1))
+
+    def score(self, batch):
+        """Return a float array with the relevance of each article in batch."""
+        if not batch:
+            return np.zeros(0)
+        counts = np.stack([data['term_counts'][0] for data in batch]).astype(np.float64)  # (articles, fields, terms)
+        words = np.array([data['term_counts'][1] for data in batch], dtype=np.float64)
+        # Short fields: diminishing returns on repeats; body: BM25 with length normalization
+        tf = np.log1p(counts)
+        body = counts[:, 2, :]
+        norm = BODY_K1 * (1 - BODY_B + BODY_B * words / REFERENCE_BODY_WORDS)
+        tf[:, 2, :] = body * (BODY_K1 + 1) / (body + norm[:, None])
+        raw = np.einsum('aft,f,t->a', tf, self.field_weights, self.idf * self.term_weights)
+        return 1 - np.exp(-raw / SCORE_SCALE)
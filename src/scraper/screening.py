@@ -0,0 +1,69 @@
+import codecs
+from html.parser import HTMLParser
+
+# Fields needed to screen a candidate: the pubdate meta plus headline/subtitle.
+# Each spec is (tag, attrs); attrs values of True only require the attribute.
+DEFAULT_SCREEN_FIELDS = (
+    ('meta', {'property': 'article:published_time'}),
+    ('h1', None),
+    ('h2', None),
+)
+SCREEN_BYTE_BUDGET = 128 * 1024
+SCREEN_CHUNK_SIZE = 16 * 1024
+VOID_TAGS = {'meta', 'link', 'img', 'br', 'hr', 'input'}
+
+def _attrs_match(spec_attrs, attrs):
+    if not spec_attrs:
+        return True
+    for name, value in spec_attrs.items():
+        if name not in attrs:
+            return False
+        if value is not True and attrs[name] != value:
+            return False
+    return True
+
+class FieldTracker(HTMLParser):
+    """Incremental parser that notes when each declared field is complete.
+
+    Void tags such as <meta> count as found on their start tag; container
+    tags such as <h1> only once their end tag arrives, so their text is whole.
+    """
+
+    def __init__(self, fields):
+        super().__init__(convert_charrefs=False)
+        self.pending = list(fields)
+        self.open = {}
+
+    @property
+    def done(self):
+        return not self.pending
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        for spec in list(self.pending):
+            spec_tag, spec_attrs = spec
+            if spec_tag == tag and _attrs_match(spec_attrs, attrs):
+                if tag in VOID_TAGS:
+                    self.pending.remove(spec)
+                else:
+                    self.open.setdefault(tag, []).append(spec)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        for spec in self.open.pop(tag, []):
+            if spec in self.pending:
+                self.pending.remove(spec)
+
+def read_head(chunks, fields=DEFAULT_SCREEN_FIELDS, byte_budget=SCREEN_BYTE_BUDGET):
+    """Consume chunks until every field is seen or byte_budget is spent; return the bytes read."""
+    tracker = FieldTracker(fields)
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    buf = bytearray()
+    for chunk in chunks:
+        buf += chunk
+        tracker.feed(decoder.decode(chunk))
+        if tracker.done or len(buf) >= byte_budget:
+            break
+    return bytes(buf)
@@ -1,4 +1,5 @@
 import re
+from datetime import timezone
 from dateutil import parser as date_parser
 
 def clean_text(text):
@@ -13,4 +14,10 @@ def parse_date(date_str):
     try:
         return date_parser.parse(date_str).isoformat()
     except Exception:
-        return None 
\ No newline at end of file
+        return None
+
+def to_naive_utc(dt):
+    # Stored and cached timestamps are naive UTC; convert aware values instead of dropping the offset
+    if dt is not None and dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
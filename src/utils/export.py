@@ -1,5 +1,194 @@
+import argparse
+import csv
+import datetime
+import gzip
+import io
 import json
+import sys
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for zstd-compressed exports
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for Parquet exports
+    pyarrow = None
+    pq = None
+
+ARTICLE_FIELDS = [
+    'url', 'headline', 'subtitle', 'publication_date', 'author', 'content',
+    'tags', 'media_urls', 'related_articles', 'scraped_at', 'keywords',
+    'relevance', 'locations',
+]
+# Fields holding lists/dicts; flattened to JSON strings in CSV and Parquet
+NESTED_FIELDS = {'tags', 'media_urls', 'related_articles', 'keywords', 'locations'}
+NUMERIC_FIELDS = {'relevance'}
+EXPORT_FORMATS = ('jsonl', 'csv', 'parquet')
+BATCH_SIZE = 500
+# Streamed responses yield lines in chunks of about this size
+CHUNK_BYTES = 64 * 1024
 
 def export_to_json(data, filename):
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2) 
\ No newline at end of file
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def _from_mapping(mapping):
+    # Core rows carry the stored column values: JSON text and datetimes are converted as Article.to_dict does
+    row = {}
+    for field in ARTICLE_FIELDS:
+        if field not in mapping:
+            continue
+        value = mapping[field]
+        if field in NESTED_FIELDS and (value is None or isinstance(value, str)):
+            value = json.loads(value) if value else []
+        elif isinstance(value, datetime.datetime):
+            value = value.isoformat()
+        row[field] = value
+    return row
+
+def iter_rows(source, batch_size=BATCH_SIZE):
+    """Yield article dicts from a SQLAlchemy query/result (ORM or Core) or any iterable of Articles or dicts."""
+    if hasattr(source, 'yield_per'):
+        source = source.yield_per(batch_size)
+    for row in source:
+        if hasattr(row, 'to_dict'):
+            yield row.to_dict()
+        elif hasattr(row, '_mapping'):
+            # session.execute(select(Article)) yields one-entity rows
+            if len(row) == 1 and hasattr(row[0], 'to_dict'):
+                yield row[0].to_dict()
+            else:
+                yield _from_mapping(row._mapping)
+        else:
+            yield row
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _flatten(row):
+    flat = {}
+    for field in ARTICLE_FIELDS:
+        value = row.get(field)
+        if field in NESTED_FIELDS and value is not None:
+            value = json.dumps(value, ensure_ascii=False, default=_json_default)
+        flat[field] = value
+    return flat
+
+def iter_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=_json_default) + '\n'
+
+def iter_csv(rows):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=ARTICLE_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    yield buf.getvalue()
+    for row in rows:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerow(_flatten(row))
+        yield buf.getvalue()
+
+def iter_chunks(lines, chunk_bytes=CHUNK_BYTES):
+    # Starlette moves a sync generator through the threadpool once per item, so one line per item is slow
+    # Lines may be str or bytes, but not both
+    parts = []
+    size = 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield parts[0][:0].join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield parts[0][:0].join(parts)
+
+def open_output(filename, compression=None):
+    """Open a text stream for writing, optionally gzip or zstd compressed."""
+    if compression is None:
+        return open(filename, 'w', encoding='utf-8', newline='')
+    if compression == 'gzip':
+        return gzip.open(filename, 'wt', encoding='utf-8', newline='')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        raw = open(filename, 'wb')
+        writer = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(writer, encoding='utf-8', newline='')
+    raise ValueError(f"Unsupported compression: {compression}")
+
+def export_to_jsonl(source, filename, compression=None):
+    count = 0
+    with open_output(filename, compression) as f:
+        for line in iter_jsonl(iter_rows(source)):
+            f.write(line)
+            count += 1
+    return count
+
+def export_to_csv(source, filename, compression=None):
+    count = -1  # header line
+    with open_output(filename, compression) as f:
+        for line in iter_csv(iter_rows(source)):
+            f.write(line)
+            count += 1
+    return max(count, 0)
+
+def export_to_parquet(source, filename, compression=None, batch_size=BATCH_SIZE):
+    if pyarrow is None:
+        raise RuntimeError("Parquet export requires the 'pyarrow' package")
+    schema = pyarrow.schema([
+        (field, pyarrow.float64() if field in NUMERIC_FIELDS else pyarrow.string()) for field in ARTICLE_FIELDS
+    ])
+    count = 0
+    batch = []
+    with pq.ParquetWriter(filename, schema, compression=compression or 'none') as writer:
+        for row in iter_rows(source, batch_size):
+            batch.append(_flatten(row))
+            if len(batch) >= batch_size:
+                writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+EXPORTERS = {
+    'jsonl': export_to_jsonl,
+    'csv': export_to_csv,
+    'parquet': export_to_parquet,
+}
+
+def export_articles(source, filename, fmt='jsonl', compression=None):
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return EXPORTERS[fmt](source, filename, compression)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dump the current article window to a file.")
+    parser.add_argument('output', help="Output file path")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='jsonl')
+    parser.add_argument('--compression', choices=['gzip', 'zstd'], default=None)
+    parser.add_argument('--hours', type=int, default=24, help="Window size in hours (by scraped_at)")
+    args = parser.parse_args(argv)
+
+    from sqlalchemy.orm import undefer, selectinload
+    from src.db import SessionLocal, Article, init_db
+    init_db()
+    session = SessionLocal()
+    try:
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=args.hours)
+        query = session.query(Article).options(undefer(Article.content), selectinload(Article.media)).filter(Article.scraped_at >= cutoff)
+        count = export_articles(query, args.output, args.format, args.compression)
+    finally:
+        session.close()
+    print(f"Exported {count} articles to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import logging
+from apscheduler.schedulers.blocking import BlockingScheduler
+from src.db import init_db
+from src.jobs import scrape_all, SCRAPE_INTERVAL_MINUTES
+from src.scraper.pipeline import shutdown_parse_pool
+from src.metrics import METRICS_PORT, serve as serve_metrics
+
+# Standalone scraper process: run with `python -m src.worker` and start the API
+# with RUN_SCHEDULER=0 so API workers can be scaled independently.
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+logger = logging.getLogger(__name__)
+
+def main():
+    init_db()
+    if METRICS_PORT:
+        # The API's /metrics only sees its own process; expose the worker's counters here
+        serve_metrics(METRICS_PORT)
+    scheduler = BlockingScheduler()
+    scheduler.add_job(scrape_all, 'interval', minutes=SCRAPE_INTERVAL_MINUTES)
+    logger.info("Scraper worker started.")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        shutdown_parse_pool()
+
+if __name__ == "__main__":
+    main()
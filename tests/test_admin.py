@@ -0,0 +1,31 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import app as api
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+    monkeypatch.setattr(api, 'scrape_all', lambda profile=None: calls.append(profile) or True)
+    client = TestClient(api.app)
+    client.calls = calls
+    return client
+
+def test_admin_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(api, 'ADMIN_TOKEN', None)
+    assert client.get('/admin/profiles').status_code == 403
+    assert client.get('/admin/profiles', headers={'X-Admin-Token': ''}).status_code == 403
+    assert client.get('/scrape-now?profile=1').status_code == 403
+    assert client.calls == []
+
+def test_admin_requires_matching_token(client, monkeypatch):
+    monkeypatch.setattr(api, 'ADMIN_TOKEN', 'secret')
+    assert client.get('/admin/profiles', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert client.get('/admin/profiles', headers={'X-Admin-Token': 'secret'}).status_code == 200
+    assert client.get('/scrape-now?profile=1', headers={'X-Admin-Token': 'secret'}).status_code == 200
+    assert client.calls == [True]
+
+def test_plain_scrape_now_needs_no_token(client, monkeypatch):
+    monkeypatch.setattr(api, 'ADMIN_TOKEN', None)
+    assert client.get('/scrape-now').json() == {"status": "Scraping triggered"}
+    assert client.calls == [None]
@@ -0,0 +1,58 @@
+import datetime
+
+from src.article_cache import ArticleCache
+
+NOW = datetime.datetime(2026, 3, 1, 12, 0)
+
+def hours_ago(hours):
+    return NOW - datetime.timedelta(hours=hours)
+
+def test_prune_evicts_only_entries_past_the_window():
+    cache = ArticleCache(window_hours=24)
+    cache['old'] = hours_ago(30)
+    cache['older'] = hours_ago(48)
+    cache['edge'] = hours_ago(24)
+    cache['new'] = hours_ago(1)
+    assert cache.prune(NOW) == 2
+    assert set(cache._ts) == {'edge', 'new'}
+    assert cache.prune(NOW) == 0
+    # An hour later the entry on the edge has expired too
+    assert cache.prune(NOW + datetime.timedelta(hours=1)) == 1
+    assert 'edge' not in cache and 'new' in cache
+
+def test_is_fresh_follows_the_window():
+    cache = ArticleCache(window_hours=24)
+    cache['a'] = hours_ago(23)
+    assert cache.is_fresh('a', NOW)
+    assert not cache.is_fresh('a', NOW + datetime.timedelta(hours=2))
+    assert not cache.is_fresh('missing', NOW)
+
+def test_reinserting_with_a_newer_date_ignores_the_stale_heap_entry():
+    cache = ArticleCache(window_hours=24)
+    cache['a'] = hours_ago(30)
+    cache['a'] = hours_ago(2)
+    assert cache.prune(NOW) == 0
+    assert cache['a'] == hours_ago(2)
+
+def test_reinserting_with_an_older_date_expires_it():
+    cache = ArticleCache(window_hours=24)
+    cache['a'] = hours_ago(2)
+    cache['a'] = hours_ago(30)
+    assert cache.prune(NOW) == 1
+    assert 'a' not in cache
+
+def test_deleted_entries_do_not_count_as_evicted():
+    cache = ArticleCache(window_hours=24)
+    cache['a'] = hours_ago(30)
+    del cache['a']
+    assert cache.prune(NOW) == 0
+    assert not cache._heap
+
+def test_repeated_updates_keep_the_heap_bounded():
+    cache = ArticleCache(window_hours=24)
+    for minutes in range(1000):
+        cache['a'] = NOW - datetime.timedelta(minutes=minutes)
+    assert len(cache) == 1
+    assert len(cache._heap) <= 2 * len(cache) + 65
+    assert cache.prune(NOW) == 0
+    assert cache['a'] == NOW - datetime.timedelta(minutes=999)
@@ -0,0 +1,68 @@
+import datetime
+import os
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.types import LargeBinary
+
+from src import bulk, db
+from src.db import Base, Article, ArticleLocation, ArticleChange
+
+# The COPY path needs PostgreSQL: point TEST_DATABASE_URL at a throwaway database
+# (e.g. postgresql+psycopg2://localhost/scraper_test); its tables are dropped afterwards.
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+pytestmark = pytest.mark.skipif(
+    not (TEST_DATABASE_URL and TEST_DATABASE_URL.startswith('postgresql')),
+    reason='TEST_DATABASE_URL does not name a PostgreSQL database',
+)
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(bulk, 'engine', engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+def _data(url, headline):
+    return {'article_url': url, 'headline': headline, 'content': 'Rivers rose.', 'source': 'test',
+            'locations': [{'country': 'PH', 'region': None, 'place': 'Philippines', 'mentions': 1}]}
+
+def test_copy_upsert_writes_and_keeps_recheck_bookkeeping(engine):
+    session = sessionmaker(bind=engine)()
+    now = datetime.datetime(2026, 3, 1)
+    assert sorted(bulk.copy_upsert_articles(session, [_data('a', 'v1'), _data('b', 'v1')], now)) == ['a', 'b']
+    session.commit()
+    assert session.get(Article, 'a').content == 'Rivers rose.'
+    assert session.query(ArticleLocation).count() == 2
+    assert session.query(ArticleChange).count() == 2
+
+    # Fresh rows are left alone
+    assert bulk.copy_upsert_articles(session, [_data('a', 'v2')], now + datetime.timedelta(hours=1)) == []
+    session.rollback()
+
+    session.query(Article).filter_by(url='a').update({Article.check_count: 3, Article.change_count: 1, Article.checked_at: now})
+    session.commit()
+    later = now + datetime.timedelta(days=2)
+    assert bulk.copy_upsert_articles(session, [_data('a', 'v2')], later) == ['a']
+    session.commit()
+    session.expire_all()
+    article = session.get(Article, 'a')
+    assert (article.headline, article.scraped_at) == ('v2', later)
+    assert (article.check_count, article.change_count, article.checked_at) == (3, 1, now)
+    session.close()
+
+def test_text_content_column_is_converted_to_bytea(engine, monkeypatch):
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE articles ALTER COLUMN content TYPE text USING convert_from(content, 'UTF8')"))
+        conn.execute(text("INSERT INTO articles (url, content) VALUES ('old', 'Plain text body')"))
+    monkeypatch.setattr(db, 'engine', engine)
+    db.add_missing_columns()
+    columns = {c['name']: c['type'] for c in inspect(engine).get_columns('articles')}
+    assert isinstance(columns['content'], LargeBinary)
+    session = sessionmaker(bind=engine)()
+    assert session.get(Article, 'old').content == 'Plain text body'
+    session.close()
@@ -0,0 +1,37 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db import Base, ArticleChange
+from src.changes import record_upsert, prune_changes, read_changes, latest_seq
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'changes.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _log(session, count):
+    for n in range(count):
+        record_upsert(session, f'u{n}')
+    session.commit()
+
+def test_resync_after_pruning_part_of_the_log(session):
+    _log(session, 3)
+    session.query(ArticleChange).filter(ArticleChange.seq < 3).delete()
+    session.commit()
+    assert read_changes(session, 1)[2] is True
+    assert read_changes(session, 2)[2] is False
+
+def test_resync_after_pruning_the_whole_log(session):
+    _log(session, 3)
+    later = datetime.datetime.utcnow() + datetime.timedelta(days=30)
+    assert prune_changes(session, later) == 3
+    assert latest_seq(session) == 3
+    assert read_changes(session, 1)[2] is True
+    assert read_changes(session, 3) == ([], 3, False)
@@ -0,0 +1,81 @@
+import datetime
+
+import pytest
+
+from src.scraper.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from src.scraper.http_client import HttpError
+
+NOW = datetime.datetime(2026, 3, 1)
+
+def _fail(breaker, status=503):
+    with pytest.raises(HttpError):
+        with breaker.guard():
+            raise HttpError('boom', status)
+
+def _succeed(breaker):
+    with breaker.guard():
+        pass
+
+def test_opens_after_consecutive_failures_and_rejects_while_cooling_down():
+    breaker = CircuitBreaker('test', threshold=3, cooldown=60)
+    _fail(breaker)
+    _fail(breaker)
+    assert breaker.state == CLOSED
+    _fail(breaker)
+    assert breaker.state == OPEN
+    assert breaker.rejecting()
+    with pytest.raises(CircuitOpenError):
+        _succeed(breaker)
+
+def test_half_open_probe_success_closes():
+    breaker = CircuitBreaker('test', threshold=1, cooldown=60, probes=1)
+    breaker.record_failure(NOW)
+    assert breaker.state == OPEN
+    assert not breaker.allow(NOW + datetime.timedelta(seconds=30))
+    assert breaker.allow(NOW + datetime.timedelta(seconds=61))
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow(NOW + datetime.timedelta(seconds=62))
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0 and breaker.cooldown == 60
+
+def test_half_open_probe_failure_reopens_with_longer_cooldown():
+    breaker = CircuitBreaker('test', threshold=1, cooldown=60)
+    breaker.record_failure(NOW)
+    later = NOW + datetime.timedelta(seconds=61)
+    assert breaker.allow(later)
+    breaker.record_failure(later)
+    assert breaker.state == OPEN
+    assert breaker.cooldown == 120
+    assert not breaker.allow(later + datetime.timedelta(seconds=100))
+    assert breaker.allow(later + datetime.timedelta(seconds=121))
+
+def test_non_source_errors_do_not_reset_the_streak():
+    breaker = CircuitBreaker('test', threshold=3, cooldown=60)
+    _fail(breaker)
+    _fail(breaker)
+    _fail(breaker, status=404)
+    with pytest.raises(ValueError):
+        with breaker.guard():
+            raise ValueError('unparseable page')
+    assert breaker.failures == 2
+    _fail(breaker)
+    assert breaker.state == OPEN
+
+def test_non_source_error_frees_the_half_open_probe():
+    breaker = CircuitBreaker('test', threshold=1, cooldown=0, probes=1)
+    breaker.record_failure()
+    _fail(breaker, status=404)
+    assert breaker.state == HALF_OPEN
+    _succeed(breaker)
+    assert breaker.state == CLOSED
+
+def test_connection_errors_count_as_failures():
+    import requests
+    breaker = CircuitBreaker('test', threshold=2, cooldown=60)
+    for exc in (requests.ConnectionError('refused'), requests.Timeout('slow')):
+        with pytest.raises(type(exc)):
+            with breaker.guard():
+                raise exc
+    assert breaker.state == OPEN
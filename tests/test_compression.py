@@ -0,0 +1,101 @@
+import datetime
+import random
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src import compression
+from src.db import Base, Article
+
+zstandard = pytest.importorskip('zstandard')
+
+WORDS = ['flood', 'earthquake', 'river', 'warning', 'evacuated', 'rescue', 'storm', 'village',
+         'officials', 'said', 'the', 'on', 'residents', 'damage', 'roads', 'closed']
+
+def _story(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(200))
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    # Dictionaries live only in this test's database
+    monkeypatch.setattr(compression, '_dicts', {})
+    monkeypatch.setattr(compression, '_active_dict', None)
+    monkeypatch.setattr(compression, '_loaded', True)
+    compression._local.cache = {}
+    engine = create_engine(f"sqlite:///{tmp_path / 'compression.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+    compression._local.cache = {}
+
+def _add_stories(session, count, prefix, seed):
+    rng = random.Random(seed)
+    now = datetime.datetime(2026, 3, 1)
+    session.add_all(
+        Article(url=f'{prefix}{n}', content=_story(rng), scraped_at=now) for n in range(count)
+    )
+    session.commit()
+
+def _raw_content(session, url):
+    return session.execute(text('SELECT content FROM articles WHERE url = :url'), {'url': url}).scalar()
+
+def _frame_dict_id(data):
+    return zstandard.get_frame_parameters(data).dict_id
+
+def test_round_trip_without_a_dictionary(session):
+    _add_stories(session, 1, 'u', seed=1)
+    raw = _raw_content(session, 'u0')
+    assert raw.startswith(compression.ZSTD_MAGIC)
+    assert _frame_dict_id(raw) == 0
+    session.expire_all()
+    assert session.get(Article, 'u0').content == _story(random.Random(1))
+
+def test_round_trip_with_a_trained_dictionary(session):
+    _add_stories(session, compression.DICT_TRAIN_MIN_SAMPLES, 'train', seed=2)
+    dict_id = compression.train_dictionary(session)
+    assert dict_id
+    session.add(Article(url='new', content='flood warning for the river village'))
+    session.commit()
+    assert _frame_dict_id(_raw_content(session, 'new')) == dict_id
+    session.expire_all()
+    assert session.get(Article, 'new').content == 'flood warning for the river village'
+    # Rows compressed before the dictionary existed still read
+    assert session.get(Article, 'train0').content
+
+def test_rows_written_under_an_older_dictionary_still_read(session):
+    _add_stories(session, compression.DICT_TRAIN_MIN_SAMPLES, 'train', seed=3)
+    first = compression.train_dictionary(session)
+    session.add(Article(url='old', content='rescue roads closed'))
+    session.commit()
+    assert compression.train_dictionary(session) is None  # one exists and force is off
+    second = compression.train_dictionary(session, force=True)
+    assert second and second != first
+    session.add(Article(url='new', content='storm damage'))
+    session.commit()
+    assert _frame_dict_id(_raw_content(session, 'old')) == first
+    assert _frame_dict_id(_raw_content(session, 'new')) == second
+    session.expire_all()
+    assert session.get(Article, 'old').content == 'rescue roads closed'
+    assert session.get(Article, 'new').content == 'storm damage'
+
+def test_plain_and_uncompressed_values_read_back():
+    assert compression.decompress(b'stored before compression') == b'stored before compression'
+    text_type = compression.CompressedText()
+    assert text_type.process_result_value('legacy TEXT row', None) == 'legacy TEXT row'
+    bytes_type = compression.CompressedBytes()
+    stored = bytes_type.process_bind_param(b'{"a": 1}', None)
+    assert bytes_type.process_result_value(stored, None) == b'{"a": 1}'
+
+def test_unknown_dictionary_id_is_an_error(session, monkeypatch):
+    _add_stories(session, compression.DICT_TRAIN_MIN_SAMPLES, 'train', seed=4)
+    compression.train_dictionary(session)
+    data = compression.compress(b'flood')
+    # Another database's dictionary: reloading does not find it either
+    monkeypatch.setattr(compression, '_dicts', {})
+    monkeypatch.setattr(compression, '_load_dicts', lambda reload=False: None)
+    compression._local.cache = {}
+    with pytest.raises(ValueError, match='Unknown zstd dictionary'):
+        compression.decompress(data)
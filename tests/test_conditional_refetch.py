@@ -0,0 +1,72 @@
+import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.db import Base, Article, ArticleChange, render_payload
+from src.db_utils import upsert_article, touch_article
+from src.scraper import http_client
+from src.scraper.generic_scraper import GenericScraper
+from src.scraper.http_cache import HttpCache
+
+ETAG = '"v1"'
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.send_header('ETag', ETAG)
+            self.end_headers()
+            return
+        body = b'<html><h1>Flood</h1></html>'
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server(monkeypatch):
+    cache = HttpCache(path='')
+    monkeypatch.setattr(http_client, 'get_http_cache', lambda: cache)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_port}/story'
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'touch.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def test_304_bumps_scraped_at_without_rewriting_the_payload(server, session):
+    upsert_article(session, {'article_url': server, 'headline': 'Flood', 'content': 'body', 'etag': ETAG})
+    before = session.execute(text('SELECT payload, scraped_at FROM articles')).one()
+    changes = session.query(ArticleChange).count()
+    stored_at = session.get(Article, server).scraped_at
+
+    scraper = GenericScraper('test', server, lambda link: True, key='touch-test')
+    html, meta = scraper.fetch_conditional(server, etag=ETAG)
+    assert html is None and meta['unchanged']
+    assert touch_article(session, meta)
+
+    after = session.execute(text('SELECT payload, scraped_at FROM articles')).one()
+    assert after.payload == before.payload
+    assert after.scraped_at != before.scraped_at
+    session.expire_all()
+    article = session.get(Article, server)
+    assert article.scraped_at > stored_at
+    assert article.scraped_at <= datetime.datetime.utcnow()
+    assert session.query(ArticleChange).count() == changes
+    assert b'"scraped_at":"' + article.scraped_at.isoformat().encode() in render_payload(article.payload, article.content, article.scraped_at)
@@ -0,0 +1,40 @@
+import datetime
+
+from src.scraper.discovery import iter_hrefs, ScreenedLinks
+
+PAGE = (
+    b'<html><body><A HREF="/first">x</A>'
+    b'<a data-href="/data" href="/real">y</a>'
+    b'<a title="a>b" href=\'/after-gt\'>z</a>'
+    b'<a class="x" title="see href=/fake">no link</a>'
+    b'<abbr href="/abbr">not a link</abbr>'
+    b'<a name="anchor">no href</a>'
+    b'<a\n  href = /unquoted?q=1&amp;r=2 rel=nofollow>u</a>'
+    b'<a href="/last">end</a>'
+)
+EXPECTED = ['/first', '/real', '/after-gt', '/unquoted?q=1&r=2', '/last']
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def test_matches_real_href_attributes_only():
+    assert list(iter_hrefs([PAGE])) == EXPECTED
+
+def test_tags_split_across_chunks():
+    for size in range(1, len(PAGE) + 1):
+        assert list(iter_hrefs(_chunks(PAGE, size))) == EXPECTED, size
+
+def test_every_split_point():
+    for cut in range(len(PAGE) + 1):
+        assert list(iter_hrefs([PAGE[:cut], PAGE[cut:]])) == EXPECTED, cut
+
+def test_unterminated_tag_at_end_of_page():
+    assert list(iter_hrefs([b'<a href="/a">a</a><a href=/b'])) == ['/a', '/b']
+
+def test_screened_links_keep_only_listed_verdicts():
+    now = datetime.datetime(2026, 1, 1, 12)
+    links = ScreenedLinks()
+    links.update(['/a', '/b'], {'/a': now, '/b': None})
+    assert links.split(['/a', '/b', '/c'], now) == (['/c'], {'/a': now, '/b': None})
+    links.update(['/b', '/c'], {})
+    assert links.split(['/a', '/b', '/c'], now) == (['/a', '/c'], {'/b': None})
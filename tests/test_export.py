@@ -0,0 +1,59 @@
+import csv
+import datetime
+import io
+import json
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from src.db import Base, Article
+from src.utils.export import iter_rows, iter_jsonl, iter_csv
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'export.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Article(
+        url='https://example.com/a', headline='A', content='body',
+        publication_date=datetime.datetime(2026, 1, 2, 3, 4, 5),
+        scraped_at=datetime.datetime(2026, 1, 3),
+        tags=json.dumps(['x']), media_urls=json.dumps(['https://example.com/a.jpg']),
+        locations=json.dumps(['Oslo']), relevance=0.5,
+    ))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+EXPECTED = {
+    'url': 'https://example.com/a', 'headline': 'A', 'subtitle': None,
+    'publication_date': '2026-01-02T03:04:05', 'author': None, 'content': 'body',
+    'tags': ['x'], 'media_urls': ['https://example.com/a.jpg'], 'related_articles': [],
+    'scraped_at': '2026-01-03T00:00:00', 'keywords': [], 'relevance': 0.5, 'locations': ['Oslo'],
+}
+
+SOURCES = {
+    'query': lambda s: s.query(Article),
+    'orm_result': lambda s: s.execute(select(Article)),
+    'core_result': lambda s: s.execute(select(Article.__table__)),
+    'dicts': lambda s: [dict(EXPECTED)],
+}
+
+@pytest.mark.parametrize('kind', SOURCES)
+def test_jsonl_from_every_source(session, kind):
+    lines = list(iter_jsonl(iter_rows(SOURCES[kind](session))))
+    assert [json.loads(line) for line in lines] == [EXPECTED]
+
+@pytest.mark.parametrize('kind', SOURCES)
+def test_csv_from_every_source(session, kind):
+    text = ''.join(iter_csv(iter_rows(SOURCES[kind](session))))
+    row = next(csv.DictReader(io.StringIO(text)))
+    assert json.loads(row['locations']) == ['Oslo']
+    assert json.loads(row['tags']) == ['x']
+    assert row['publication_date'] == '2026-01-02T03:04:05'
+
+def test_jsonl_serializes_datetimes():
+    row = {'url': 'u', 'scraped_at': datetime.datetime(2026, 1, 3)}
+    assert json.loads(next(iter_jsonl([row])))['scraped_at'] == '2026-01-03T00:00:00'
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from bs4 import BeautifulSoup
+
+from src.scraper.extraction import DEFAULT_FIELDS, LIST_FIELDS, ExtractionPlan
+from src.scraper.scraper_config import SOURCES_FILE
+from src.utils.clean import clean_text, parse_date
+
+with open(SOURCES_FILE) as f:
+    SOURCES = json.load(f)
+
+FIELDS = ('headline', 'publication_date', 'content', 'tags')
+PUBLISHED = '2026-03-01T08:30:00+00:00'
+
+def _specs(fields, field):
+    spec = dict(DEFAULT_FIELDS, **(fields or {}))[field]
+    return [] if spec is None else spec if isinstance(spec, list) else [spec]
+
+def _element(spec, text, value):
+    attrs = {name: 'x' if wanted is True else wanted for name, wanted in (spec.get('attrs') or {}).items()}
+    if spec.get('attr'):
+        attrs[spec['attr']] = value
+    rendered = ''.join(f' {name}="{v}"' for name, v in attrs.items())
+    if spec['tag'] == 'meta':
+        return f'<meta{rendered}>'
+    return f'<{spec["tag"]}{rendered}>{text}</{spec["tag"]}>'
+
+def _fixture(fields):
+    """An article page built from the source's first selector for each field."""
+    head, body = [], []
+    for field, text, value in (
+        ('headline', 'Floods  hit\nthe coast', None),
+        ('publication_date', 'March 1', PUBLISHED),
+    ):
+        spec = _specs(fields, field)[0]
+        (head if spec['tag'] == 'meta' else body).append(_element(spec, text, value))
+    content = _specs(fields, 'content')[0]
+    body.append(_element(content, '<p>Rivers rose overnight.</p><script>track()</script><p>Roads  closed.</p>', None))
+    for spec in _specs(fields, 'tags')[:1]:
+        for tag in ('Weather', 'Asia'):
+            (head if spec['tag'] == 'meta' else body).append(_element(spec, tag, tag))
+    # A second match for single-value fields, which must not win
+    body.append('<h1>Most read</h1><article>Other story</article>')
+    return f'<html><head>{"".join(head)}</head><body>{"".join(body)}</body></html>'
+
+def _per_field(fields, html):
+    # The BeautifulSoup find()/find_all() path the per-source extractors used
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup.find_all('script'):
+        script.decompose()
+    result = {}
+    for field in FIELDS:
+        result[field] = [] if field in LIST_FIELDS else None
+        for spec in _specs(fields, field):
+            if 'relative' in spec:
+                continue
+            attrs = spec.get('attrs') or {}
+            if spec.get('all'):
+                found = soup.find_all(spec['tag'], attrs)
+                value = [el[spec['attr']] for el in found if el.get(spec['attr'])] if spec.get('attr') else [el.text for el in found]
+            else:
+                el = soup.find(spec['tag'], attrs)
+                if el is None:
+                    continue
+                value = el.get(spec['attr']) if spec.get('attr') else el.text
+                value = parse_date(value) if field == 'publication_date' else clean_text(value)
+            if value:
+                result[field] = value
+                break
+    return result
+
+@pytest.mark.parametrize('source', SOURCES, ids=[source['key'] for source in SOURCES])
+def test_plan_matches_the_per_field_path(source):
+    fields = source.get('fields')
+    html = _fixture(fields)
+    extracted = ExtractionPlan(fields).extract(html, FIELDS)
+    assert extracted == _per_field(fields, html)
+    assert extracted['headline'] == 'Floods hit the coast'
+    assert extracted['publication_date'] == parse_date(PUBLISHED)
+    assert extracted['content'] == 'Rivers rose overnight.Roads closed.'
+    if _specs(fields, 'tags'):
+        assert extracted['tags'] == ['Weather', 'Asia']
+    else:
+        assert extracted['tags'] == []
+
+def test_relative_date_fallback():
+    plan = ExtractionPlan({'publication_date': [{'tag': 'meta', 'attrs': {'name': 'pubdate'}, 'attr': 'content'}, {'relative': ['span', 'time']}]})
+    extracted = plan.extract('<html><body><span>Share</span><time>2 March 2026</time></body></html>', ('publication_date',))
+    assert extracted['publication_date'].startswith('2026-03-02')
+
+def test_unclosed_elements_end_with_their_parent():
+    plan = ExtractionPlan({'content': {'tag': 'div', 'attrs': {'class': 'body'}}})
+    html = '<div class="body"><p>One<p>Two</div><p>Outside</p>'
+    assert plan.extract(html, ('content',))['content'] == 'OneTwo'
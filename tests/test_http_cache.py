@@ -0,0 +1,128 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from src.scraper import http_client
+from src.scraper import http_cache
+from src.scraper.http_cache import HttpCache, freshness_lifetime, parse_cache_control
+
+class Handler(BaseHTTPRequestHandler):
+    body = b'v1'
+    requests = []
+
+    def do_GET(self):
+        Handler.requests.append(self.headers.get('If-None-Match'))
+        etag = '"' + Handler.body.decode() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Cache-Control', 'max-age=3600')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(Handler.body)))
+        self.end_headers()
+        self.wfile.write(Handler.body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server(monkeypatch):
+    cache = HttpCache(path='')
+    monkeypatch.setattr(http_client, 'get_http_cache', lambda: cache)
+    Handler.body = b'v1'
+    Handler.requests = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_port}/story'
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_fresh_entries_are_served_from_cache(server):
+    client = http_client.HttpClient(http2=False)
+    assert client.get(server, cache_source='test').content == b'v1'
+    Handler.body = b'v2'
+    assert client.get(server, cache_source='test').content == b'v1'
+    assert len(Handler.requests) == 1
+
+def test_revalidate_skips_fresh_entries(server):
+    client = http_client.HttpClient(http2=False)
+    client.get(server, cache_source='test')
+    # Unchanged: the cached validators get a 304 and the cached body back
+    assert client.get(server, cache_source='test', revalidate=True).content == b'v1'
+    Handler.body = b'v2'
+    assert client.get(server, cache_source='test', revalidate=True).content == b'v2'
+    assert Handler.requests == [None, '"v1"', '"v1"']
+
+def test_caller_validators_bypass_fresh_entries(server):
+    client = http_client.HttpClient(http2=False)
+    client.get(server, cache_source='test')
+    resp = client.get(server, headers={'If-None-Match': '"v1"'}, cache_source='test')
+    assert resp.status_code == 304
+
+NOW = 1_800_000_000.0
+
+def test_cache_control_parsing():
+    assert parse_cache_control('public, max-age=300, no-cache="Set-Cookie"') == {
+        'public': '', 'max-age': '300', 'no-cache': 'Set-Cookie'}
+    assert parse_cache_control(None) == {}
+
+@pytest.mark.parametrize('headers, lifetime', [
+    ({'Cache-Control': 'max-age=300'}, 300.0),
+    ({'Cache-Control': 'max-age=300', 'Age': '100'}, 200.0),
+    ({'Cache-Control': 'max-age=bogus'}, 0.0),
+    ({'Cache-Control': 'no-store, max-age=300'}, None),
+    ({'Cache-Control': 'no-cache'}, 0.0),
+    ({'Vary': '*'}, None),
+    ({'Date': 'Fri, 15 Jan 2027 08:00:00 GMT', 'Expires': 'Fri, 15 Jan 2027 08:10:00 GMT'}, 600.0),
+    # 10% of the page's age, capped at an hour
+    ({'Date': 'Fri, 15 Jan 2027 08:00:00 GMT', 'Last-Modified': 'Fri, 15 Jan 2027 07:00:00 GMT'}, 360.0),
+    ({'Date': 'Fri, 15 Jan 2027 08:00:00 GMT', 'Last-Modified': 'Fri, 01 Jan 2027 08:00:00 GMT'}, 3600.0),
+    ({}, 0.0),
+])
+def test_freshness_lifetime(headers, lifetime):
+    assert freshness_lifetime(CaseInsensitiveDict(headers), NOW) == lifetime
+
+def test_ttl_overrides_headers():
+    assert freshness_lifetime({'Cache-Control': 'no-store'}, NOW, ttl=60) == 60.0
+
+def test_memory_lru_falls_back_to_sqlite(tmp_path):
+    path = str(tmp_path / 'http_cache.db')
+    cache = HttpCache(path=path, memory_bytes=10)
+    cache.store('a', CaseInsensitiveDict({'ETag': '"a"'}), b'aaaaaa', 60, now=NOW)
+    cache.store('b', {}, b'bbbbbb', 60, now=NOW)
+    # a was least recently used and no longer fits in memory
+    assert list(cache._memory) == ['b']
+    entry = cache.lookup('a', now=NOW)
+    assert entry.body == b'aaaaaa' and entry.validators() == {'If-None-Match': '"a"'}
+    assert list(cache._memory) == ['a']
+    # A new process reads what the last one stored
+    restarted = HttpCache(path=path)
+    assert restarted.lookup('b', now=NOW).fresh(NOW + 30)
+    assert not restarted.lookup('b', now=NOW).fresh(NOW + 61)
+    assert restarted.lookup('missing', now=NOW) is None
+
+def test_entries_past_retention_are_not_returned():
+    cache = HttpCache(path='')
+    cache.store('a', {}, b'a', 60, now=NOW)
+    assert cache.lookup('a', now=NOW + http_cache.RETENTION_SECONDS + 1) is None
+
+def test_hit_and_miss_counters():
+    cache = HttpCache(path='')
+    cache.record('src', 'miss')
+    cache.record('src', 'hit', 100)
+    cache.record('src', 'revalidated', 50)
+    cache.record('src', 'hit', 100)
+    assert cache.stats('src') == {'hit': 2, 'revalidated': 1, 'miss': 1, 'bytes_saved': 250, 'hit_ratio': 0.75}
+    assert cache.stats('other')['hit_ratio'] == 0.0
+
+def test_client_counts_hits_and_misses(server):
+    client = http_client.HttpClient(http2=False)
+    client.get(server, cache_source='counted')
+    client.get(server, cache_source='counted')
+    stats = http_client.get_http_cache().stats('counted')
+    assert (stats['miss'], stats['hit'], stats['bytes_saved']) == (1, 1, 2)
@@ -0,0 +1,79 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.scraper import http_client
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    body = b''
+    send_length = True
+
+    def do_GET(self):
+        self.send_response(200)
+        if Handler.send_length:
+            self.send_header('Content-Length', str(len(Handler.body)))
+        else:
+            self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        if Handler.send_length:
+            self.wfile.write(Handler.body)
+            return
+        for start in range(0, len(Handler.body), 1024):
+            part = Handler.body[start:start + 1024]
+            self.wfile.write(f'{len(part):x}\r\n'.encode() + part + b'\r\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    Handler.body = b'x' * 10_000
+    Handler.send_length = True
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_port}/page'
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_body_under_the_cap_is_returned(server):
+    client = http_client.HttpClient(http2=False)
+    assert client.get(server, max_bytes=10_000).content == Handler.body
+
+def test_content_length_over_the_cap_is_refused(server):
+    client = http_client.HttpClient(http2=False)
+    with pytest.raises(http_client.ResponseTooLarge, match='Content-Length'):
+        client.get(server, max_bytes=9_999)
+
+def test_streamed_body_is_cut_off_at_the_cap(server):
+    Handler.send_length = False
+    client = http_client.HttpClient(http2=False)
+    with client.stream_capped(server, max_bytes=4_096, chunk_size=1024) as (resp, chunks):
+        received = []
+        with pytest.raises(http_client.ResponseTooLarge, match='body exceeds'):
+            for chunk in chunks:
+                received.append(chunk)
+    assert sum(map(len, received)) <= 4_096
+
+def test_http2_falls_back_to_requests_without_httpx(monkeypatch, caplog):
+    monkeypatch.setattr(http_client, 'httpx', None)
+    with caplog.at_level(logging.WARNING, logger=http_client.__name__):
+        client = http_client.HttpClient(http2=True)
+    assert client._h2 is None
+    assert 'httpx[http2] is not installed' in caplog.text
+
+def test_http1_never_builds_an_httpx_client():
+    assert http_client.HttpClient(http2=False)._h2 is None
+
+def test_http2_uses_httpx_when_installed(server):
+    pytest.importorskip('h2')
+    if http_client.httpx is None:
+        pytest.skip('httpx is not installed')
+    client = http_client.HttpClient(http2=True)
+    assert client._h2 is not None
+    # Plain http negotiates HTTP/1.1 inside httpx; the body still comes through the httpx path
+    assert client.get(server).content == Handler.body
+    assert not client._hosts
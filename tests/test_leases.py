@@ -0,0 +1,53 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db import Base, JobLease
+from src.db_utils import acquire_lease, lease_holder, release_lease
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'leases.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _expire(session, name):
+    session.query(JobLease).filter_by(name=name).update(
+        {JobLease.expires_at: datetime.datetime.utcnow() - datetime.timedelta(seconds=1)})
+    session.commit()
+
+def test_live_lease_is_refused_to_others(session):
+    assert acquire_lease(session, 'job', 'a', 60)
+    assert not acquire_lease(session, 'job', 'b', 60)
+    assert lease_holder(session, 'job') == 'a'
+    # The holder renews it
+    assert acquire_lease(session, 'job', 'a', 60)
+
+def test_expired_lease_is_taken_over(session):
+    assert acquire_lease(session, 'job', 'a', 60)
+    _expire(session, 'job')
+    assert acquire_lease(session, 'job', 'b', 60)
+    assert lease_holder(session, 'job') == 'b'
+    assert not acquire_lease(session, 'job', 'a', 60)
+
+def test_release_frees_the_lease(session):
+    acquire_lease(session, 'job', 'a', 60)
+    release_lease(session, 'job', 'b')  # not the holder: no effect
+    assert lease_holder(session, 'job') == 'a'
+    release_lease(session, 'job', 'a')
+    assert lease_holder(session, 'job') is None
+    assert acquire_lease(session, 'job', 'b', 60)
+
+def test_release_with_hold_until_keeps_it_until_then(session):
+    acquire_lease(session, 'job', 'a', 60)
+    hold_until = datetime.datetime.utcnow() + datetime.timedelta(minutes=10)
+    release_lease(session, 'job', 'a', hold_until=hold_until)
+    assert session.query(JobLease.expires_at).filter_by(name='job').scalar() == hold_until
+    assert not acquire_lease(session, 'job', 'b', 60)
+    _expire(session, 'job')
+    assert acquire_lease(session, 'job', 'b', 60)
@@ -0,0 +1,36 @@
+from src.scraper.locations import Gazetteer
+
+GAZETTEER = Gazetteer({
+    'PG': {'name': 'Papua New Guinea'},
+    'GN': {'name': 'Guinea'},
+    'PH': {'name': 'Philippines', 'regions': {'Quezon': ['Lucena'], 'Metro Manila': ['Quezon City', 'Manila']}},
+    'US': {'name': 'United States', 'aliases': ['US'], 'regions': {'Georgia': ['Atlanta']}},
+    'GE': {'name': 'Georgia', 'cities': ['Tbilisi']},
+    'TR': {'name': 'Turkey'},
+})
+
+def _places(*texts):
+    return {(loc['country'], loc['region'], loc['place']): loc['mentions'] for loc in GAZETTEER.locate(*texts)}
+
+def test_longest_multi_word_name_wins():
+    assert _places('Papua New Guinea declared an emergency.') == {('PG', None, 'Papua New Guinea'): 1}
+    assert _places('Guinea and Papua New Guinea') == {('GN', None, 'Guinea'): 1, ('PG', None, 'Papua New Guinea'): 1}
+
+def test_overlapping_names_match_once():
+    # "Quezon City" is a city in Metro Manila, not the Quezon province
+    assert _places('Flooding in Quezon City.') == {('PH', 'Metro Manila', 'Quezon City'): 1}
+    assert _places('Quezon province and Metro Manila') == {
+        ('PH', 'Quezon', 'Quezon'): 1, ('PH', 'Metro Manila', 'Metro Manila'): 1,
+    }
+
+def test_mentions_are_counted_across_texts():
+    assert _places('Manila', 'Storm nears Manila') == {('PH', 'Metro Manila', 'Manila'): 2}
+
+def test_acronyms_and_lower_case_words():
+    assert _places('The US sent aid.') == {('US', None, 'United States'): 1}
+    assert _places('aid reached us and the turkey farms') == {}
+
+def test_shared_names_follow_the_other_places_mentioned():
+    assert _places('Georgia storm hits Tbilisi') == {('GE', None, 'Georgia'): 1, ('GE', None, 'Tbilisi'): 1}
+    assert _places('Georgia storm hits Atlanta') == {('US', 'Georgia', 'Georgia'): 1, ('US', 'Georgia', 'Atlanta'): 1}
+    assert set(_places('Georgia storm')) == {('GE', None, 'Georgia'), ('US', 'Georgia', 'Georgia')}
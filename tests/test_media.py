@@ -0,0 +1,50 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src import media
+from src.db import Base, Article, ArticleChange
+from src.db_utils import upsert_article, apply_recheck, refilter_media
+
+LOGO = 'http://x.test/img/brand.jpg'
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'media.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(media, 'BOILERPLATE_REFRESH_SECONDS', 0)
+    media.clear_boilerplate()
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _data(n, images):
+    return {'article_url': f'http://x.test/{n}', 'source': 'x', 'headline': f'h{n}', 'content': 'c', 'media_urls': images}
+
+def _payload_media(session, n):
+    return json.loads(session.get(Article, f'http://x.test/{n}').payload)['media_urls']
+
+def _store(session, count):
+    for n in range(count):
+        upsert_article(session, _data(n, [LOGO, f'http://x.test/img/{n}.jpg']))
+
+def test_boilerplate_is_learned_and_hidden_in_older_payloads(session):
+    _store(session, 8)
+    assert _payload_media(session, 0) == [LOGO, 'http://x.test/img/0.jpg']
+    assert _payload_media(session, 7) == ['http://x.test/img/7.jpg']
+    assert refilter_media(session) == media.MEDIA_BOILERPLATE_MIN_PAGES
+    assert _payload_media(session, 0) == ['http://x.test/img/0.jpg']
+    assert refilter_media(session) == 0
+
+def test_recheck_ignores_boilerplate_changes(session):
+    _store(session, 8)
+    changes_before = session.query(ArticleChange).count()
+    # Article 0 was stored with the logo kept; the logo is boilerplate by now
+    assert apply_recheck(session, _data(0, [LOGO, 'http://x.test/img/0.jpg'])) is False
+    assert apply_recheck(session, _data(1, [LOGO, 'http://x.test/img/new.jpg'])) is True
+    session.commit()
+    assert session.query(ArticleChange).count() == changes_before + 1
+    assert _payload_media(session, 1) == ['http://x.test/img/new.jpg']
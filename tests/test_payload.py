@@ -0,0 +1,60 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src import compression
+from src.api import app as api
+from src.db import Base, Article, rebuild_stale_payloads
+from src.db_utils import upsert_article
+from src.utils.serialize import dumps
+
+BODY = 'Rivers burst their banks overnight. ' * 20
+
+@pytest.fixture
+def Session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'payload.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+def _raw_payload(session, url):
+    return session.execute(text('SELECT payload FROM articles WHERE url = :url'), {'url': url}).scalar()
+
+def test_payload_is_plain_json_without_content(Session):
+    session = Session()
+    upsert_article(session, {'article_url': 'u1', 'headline': 'Flood', 'content': BODY, 'tags': ['flood']})
+    raw = _raw_payload(session, 'u1')
+    assert not raw.startswith(compression.ZSTD_MAGIC)
+    stored = json.loads(raw)
+    assert 'content' not in stored and 'scraped_at' not in stored
+    assert stored['tags'] == ['flood']
+    session.close()
+
+def test_articles_endpoint_renders_content_once(Session, monkeypatch):
+    session = Session()
+    upsert_article(session, {'article_url': 'u1', 'headline': 'Flood', 'content': BODY})
+    # A row from before payloads existed is serialized on the fly
+    session.add(Article(url='u2', headline='Quake', content='Shaking.', scraped_at=session.get(Article, 'u1').scraped_at))
+    session.commit()
+    expected = {a.url: a.to_dict() for a in session.query(Article)}
+    session.close()
+    monkeypatch.setattr(api, 'SessionLocal', Session)
+    monkeypatch.setattr(api, 'get_async_sessionmaker', lambda: None)
+    articles = TestClient(api.app).get('/articles').json()
+    assert {a['url']: a for a in articles} == expected
+
+def test_old_compressed_payloads_are_rebuilt(Session):
+    session = Session()
+    upsert_article(session, {'article_url': 'u1', 'headline': 'Flood', 'content': BODY})
+    article = session.get(Article, 'u1')
+    old = article.to_dict()
+    del old['scraped_at']
+    session.execute(text('UPDATE articles SET payload = :payload'), {'payload': compression.compress(dumps(old))})
+    session.commit()
+    assert rebuild_stale_payloads(session) == 1
+    assert 'content' not in json.loads(_raw_payload(session, 'u1'))
+    assert rebuild_stale_payloads(session) == 0
+    session.close()
@@ -0,0 +1,37 @@
+import datetime
+
+from src.scraper import pipeline
+from src.scraper.discovery import ScreenedLinks
+
+NOW = datetime.datetime(2026, 1, 1, 12)
+
+class FakeScraper:
+    key = name = 'fake'
+    feed_url = None
+    homepage_url = 'http://example.com/'
+
+    def __init__(self, links):
+        self.links = links
+        self.screened_links = ScreenedLinks()
+
+    def discover_links(self):
+        return self.links
+
+    def fetch_head(self, url):
+        return url
+
+def test_failed_screens_get_no_verdict(monkeypatch):
+    def screen(name, url, html, now):
+        return {'/ok': NOW, '/old': None}.get(url, pipeline.SCREEN_FAILED)
+
+    def run_stages(name, fetch, urls, task, *args, stop=None, stage='article'):
+        for url in urls:
+            yield url, task(name, url, fetch(url)[0], *args)
+
+    monkeypatch.setattr(pipeline, 'HOMEPAGE_DIFF', True)
+    monkeypatch.setattr(pipeline, '_run_stages', run_stages)
+    monkeypatch.setattr(pipeline, 'screen_task', screen)
+    scraper = FakeScraper(['/ok', '/old', '/broken'])
+    assert pipeline.find_candidates('fake', scraper) == [('/ok', NOW)]
+    # The failed link is screened again next run; the others keep their verdict
+    assert scraper.screened_links.split(scraper.links, NOW) == (['/broken'], {'/ok': NOW, '/old': None})
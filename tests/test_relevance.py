@@ -0,0 +1,66 @@
+from src.scraper.relevance import MIN_RELEVANCE, RelevanceScorer, get_counter
+
+KEYWORDS = ('flood', 'earthquake', 'wildfire', 'ash')
+
+def _article(headline='', content=''):
+    data = {'headline': headline, 'subtitle': '', 'content': content}
+    data['term_counts'] = get_counter(KEYWORDS).field_counts(data)
+    return data
+
+BODY_ONLY = _article('Council meeting', ' '.join(['word'] * 300 + ['flood'] + ['word'] * 299))
+
+def test_body_only_mention_passes():
+    assert RelevanceScorer(KEYWORDS).score([BODY_ONLY])[0] >= MIN_RELEVANCE
+    # Even when every stored article matched the term
+    saturated = RelevanceScorer(KEYWORDS, [['flood']] * 50)
+    assert saturated.score([BODY_ONLY])[0] >= MIN_RELEVANCE
+
+def test_weak_terms_alone_do_not_pass():
+    assert RelevanceScorer(KEYWORDS).score([_article('Match report', 'ash ' + 'word ' * 500)])[0] < MIN_RELEVANCE
+
+def test_score_does_not_depend_on_batch_or_order():
+    scorer = RelevanceScorer(KEYWORDS, [['flood'], ['earthquake'], []])
+    alone = scorer.score([BODY_ONLY])[0]
+    disasters = [_article('Earthquake hits', 'earthquake flood') for _ in range(20)]
+    unrelated = [_article('Markets', 'stocks') for _ in range(20)]
+    scorer.score(disasters)
+    assert scorer.score(unrelated + [BODY_ONLY])[-1] == alone
+    assert scorer.score([BODY_ONLY] + disasters)[0] == alone
+
+def test_rare_terms_weigh_more():
+    scorer = RelevanceScorer(KEYWORDS, [['flood']] * 9 + [['wildfire']])
+    flood, wildfire = scorer.score([_article('Flood warning'), _article('Wildfire warning')])
+    assert wildfire > flood
+
+def test_background_discounts_terms_common_in_rejected_articles():
+    stored = [['flood']] * 5 + [['ash']]
+    plain = RelevanceScorer(KEYWORDS, stored)
+    with_background = RelevanceScorer(KEYWORDS, stored, background=[['ash']] * 40 + [[]] * 40)
+    ash, flood = plain.score([_article('Ash cloud'), _article('Flood warning')])
+    bg_ash, bg_flood = with_background.score([_article('Ash cloud'), _article('Flood warning')])
+    assert bg_ash < ash
+    assert bg_flood > flood
+
+def test_rejected_articles_feed_the_next_scorer(tmp_path, monkeypatch):
+    import datetime
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from src import jobs
+    from src.article_cache import ArticleCache
+    from src.db import Base
+    engine = create_engine(f"sqlite:///{tmp_path / 'relevance.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(jobs, 'SessionLocal', sessionmaker(bind=engine))
+    monkeypatch.setattr(jobs, 'article_cache', ArticleCache(jobs.CACHE_WINDOW_HOURS))
+    monkeypatch.setattr(jobs, 'rejected_keywords', jobs.collections.deque())
+    now = datetime.datetime(2026, 3, 1)
+    unrelated = _article('Match report', 'ash ' + 'word ' * 500)
+    unrelated.update(article_url='u1', keywords=['ash'])
+    assert jobs._score_batch('test', [unrelated], RelevanceScorer(KEYWORDS), now) == []
+    assert list(jobs.rejected_keywords) == [(now, ['ash'])]
+    scorer = jobs._get_scorer({}, KEYWORDS, now)
+    assert scorer.idf[KEYWORDS.index('ash')] < scorer.idf[KEYWORDS.index('flood')]
+    # Entries leave the background with the window
+    jobs._get_scorer({}, KEYWORDS, now + datetime.timedelta(hours=jobs.CACHE_WINDOW_HOURS + 1))
+    assert not jobs.rejected_keywords
+    engine.dispose()